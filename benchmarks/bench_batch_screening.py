@@ -0,0 +1,98 @@
+"""
+Accuracy and speed of batch screening against the per-paper debate screening.
+Requires a running Ollama server with the model pulled (and network access with --query).
+
+Every paper is screened twice: with the full abstract debate (analyze_paper_with_debate, the current
+Phase 1) and with BatchScreener. The debate verdict (relevance >= 4, the pipeline's download gate) is
+the reference; the report shows how often batch screening agrees, how many reference-accepted papers it
+would drop (recall), the mean absolute score difference and the wall time of each.
+
+Usage:
+  python benchmarks/bench_batch_screening.py "viewpoint" --query "search query" [--batch_size 8]
+  python benchmarks/bench_batch_screening.py "viewpoint" --papers papers.json   (list of {title, abstract})
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from cache import AnalysisCache
+from workflow import WorkflowOrchestrator
+from screening import BatchScreener, DEFAULT_THRESHOLD
+
+PASS_SCORE = 4
+
+def load_papers(args):
+    if args.papers:
+        with open(args.papers, encoding="utf-8") as f:
+            return json.load(f)
+    from searcher import Searcher
+    return Searcher().search_multiple_queries([args.query], limit_per_source=args.limit)
+
+def batch_scores(screener, papers, batch_size):
+    scores = [None] * len(papers)
+    def score(i):
+        scores[i] = screener.score(papers[i])
+    # Mirror the pipeline: one batch_screen worker per batch slot
+    for start in range(0, len(papers), batch_size):
+        threads = [threading.Thread(target=score, args=(i,)) for i in range(start, min(start + batch_size, len(papers)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("viewpoint")
+    parser.add_argument("--query")
+    parser.add_argument("--papers")
+    parser.add_argument("--limit", type=int, default=10, help="Results per source with --query")
+    parser.add_argument("--model", default="qwen2.5:7b")
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    if not args.query and not args.papers:
+        parser.error("pass --query or --papers")
+
+    papers = [p for p in load_papers(args) if p.get('abstract')]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # A fresh analysis cache, so the debates are timed for real and the user's cache is left alone
+        analysis_cache = AnalysisCache(os.path.join(cache_dir, "analysis_cache.json"))
+        orchestrator = WorkflowOrchestrator(model=args.model, analysis_cache=analysis_cache)
+
+        start = time.perf_counter()
+        reference = [orchestrator.analyze_paper_with_debate(args.viewpoint, p).get('relevance_score', 0) for p in papers]
+        t_debate = time.perf_counter() - start
+        analysis_cache.cache.close()
+
+    screener = BatchScreener(orchestrator.student, args.viewpoint, batch_size=args.batch_size, threshold=args.threshold, linger=0.5)
+    start = time.perf_counter()
+    batch = batch_scores(screener, papers, args.batch_size)
+    t_batch = time.perf_counter() - start
+
+    ref_pass = [s >= PASS_SCORE for s in reference]
+    batch_pass = [s is None or s >= args.threshold for s in batch]
+    agree = sum(r == b for r, b in zip(ref_pass, batch_pass))
+    kept = sum(r and b for r, b in zip(ref_pass, batch_pass))
+    scored = [(r, b) for r, b in zip(reference, batch) if b is not None]
+
+    print(f"{'paper':<60} {'debate':>7} {'batch':>6}")
+    for p, r, b in zip(papers, reference, batch):
+        print(f"{p['title'][:60]:<60} {r:>7.0f} {str(b):>6}")
+    print()
+    print(f"papers: {len(papers)}, batch calls: {screener.stats()['batches']}, unscored: {screener.stats()['unscored']}")
+    print(f"verdict agreement: {agree}/{len(papers)} ({agree / max(1, len(papers)):.0%})")
+    print(f"recall of debate-accepted papers: {kept}/{sum(ref_pass)} ({kept / max(1, sum(ref_pass)):.0%})")
+    if scored:
+        print(f"mean |debate - batch| score: {sum(abs(r - b) for r, b in scored) / len(scored):.2f}")
+    print(f"papers batch screening would send to the debate: {sum(batch_pass)}/{len(papers)}")
+    print(f"time: per-paper debate {t_debate:.1f}s, batch screening {t_batch:.1f}s")
+
+if __name__ == "__main__":
+    main()
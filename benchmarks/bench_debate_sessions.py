@@ -0,0 +1,75 @@
+"""
+Prefill benchmark for debate sessions. Requires a running Ollama server with the model pulled.
+
+Runs the same debate rounds (Advisor review, then Student revision) twice: once with the previous
+single-message prompts that resend the paper every time, and once in a DebateSession, where the paper
+is a shared system prefix and rounds are appended as conversation turns. For every request it reports
+Ollama's prompt_eval_count (prompt tokens actually prefilled, i.e. not served from the prompt cache)
+and the request latency.
+
+Usage: python benchmarks/bench_debate_sessions.py paper.txt [--model qwen2.5:7b] [--rounds 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from agents.student import StudentAgent
+from agents.advisor import AdvisorAgent
+from agents.session import DebateSession
+
+VIEWPOINT = "Evaluate whether this paper is relevant to the reader's research problem."
+
+def run_debate(student, advisor, title, text, rounds, use_session):
+    """Per-request rows of (round, agent, prefilled prompt tokens, latency in seconds)."""
+    last_metrics = {}
+    for agent in (student, advisor):
+        agent.on_metrics = lambda model, metrics: last_metrics.update(metrics)
+
+    def measure(round_no, role, call):
+        last_metrics.clear()
+        start = time.perf_counter()
+        result = call()
+        rows.append((round_no, role, last_metrics.get('prompt_eval_count'), time.perf_counter() - start))
+        return result
+
+    analysis = student.analyze_initial(VIEWPOINT, title, text)
+    session = DebateSession(title, text) if use_session else None
+    rows = []
+    for i in range(rounds):
+        review = measure(i + 1, 'advisor', lambda: advisor.review_analysis(analysis, text, debate_round=i, session=session))
+        analysis = measure(i + 1, 'student', lambda: student.revise_analysis(analysis, review.get('critique'), text, session=session))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paper", help="Text file with the paper content")
+    parser.add_argument("--model", default="qwen2.5:7b")
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    with open(args.paper, encoding="utf-8") as f:
+        text = f.read()
+    title = os.path.splitext(os.path.basename(args.paper))[0]
+
+    results = {}
+    for mode, use_session in (('single-message', False), ('session', True)):
+        student, advisor = StudentAgent(args.model), AdvisorAgent(args.model)
+        results[mode] = run_debate(student, advisor, title, text, args.rounds, use_session)
+
+    print(f"{'round':>5} {'agent':>8} {'prefill before':>15} {'prefill after':>14} {'latency before (s)':>19} {'latency after (s)':>18}")
+    totals = [0, 0, 0.0, 0.0]
+    for before, after in zip(results['single-message'], results['session']):
+        round_no, role, tokens_before, t_before = before
+        _, _, tokens_after, t_after = after
+        totals[0] += tokens_before or 0
+        totals[1] += tokens_after or 0
+        totals[2] += t_before
+        totals[3] += t_after
+        print(f"{round_no:>5} {role:>8} {str(tokens_before):>15} {str(tokens_after):>14} {t_before:>19.1f} {t_after:>18.1f}")
+    print(f"{'total':>14} {totals[0]:>15} {totals[1]:>14} {totals[2]:>19.1f} {totals[3]:>18.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for the candidate filtering stage of Searcher.search_multiple_queries.
+
+Compares the previous implementation (per-term substring scan + list-membership fallback)
+with the current one (KeywordMatcher + paper-key sets) on synthetic candidates.
+
+Usage: python benchmarks/bench_keyword_filter.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from keyword_matcher import KeywordMatcher
+from dedup import paper_key
+import heapq
+
+def make_vocabulary(size, rng):
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(size)]
+
+def make_candidates(n, vocab, rng):
+    return [{
+        'paperId': f"p{i}",
+        'title': " ".join(rng.choices(vocab, k=10)).title(),
+        'abstract': " ".join(rng.choices(vocab, k=180)),
+        'citations': rng.randint(0, 5000),
+    } for i in range(n)]
+
+def make_terms(k, vocab, rng):
+    # Mostly absent terms (suffix never generated), so almost every candidate is scanned in full
+    # and the adaptive fallback path is exercised.
+    return [" ".join(rng.choices(vocab, k=rng.randint(1, 2))) + "qq" for _ in range(k)]
+
+def get_citations(p):
+    c = p.get('citations')
+    if isinstance(c, int): return c
+    if isinstance(c, str) and c.isdigit(): return int(c)
+    return 0
+
+def legacy_filter(candidates, keywords, min_results=5):
+    filter_terms = [k.lower().strip() for k in keywords]
+    filtered = []
+    for res in candidates:
+        combined = res['title'].lower().strip() + " " + (res.get('abstract') or "").lower()
+        for term in filter_terms:
+            if term in combined:
+                filtered.append(res)
+                break
+    if len(filtered) < min_results and len(candidates) > len(filtered):
+        rejected = [p for p in candidates if p not in filtered]
+        rejected.sort(key=get_citations, reverse=True)
+        filtered.extend(rejected[:(min_results * 2) - len(filtered)])
+    return filtered
+
+def current_filter(candidates, keywords, min_results=5):
+    matcher = KeywordMatcher(keywords)
+    filtered = [res for res in candidates if matcher.matches(res['title'] + " " + (res.get('abstract') or ""))]
+    if len(filtered) < min_results and len(candidates) > len(filtered):
+        selected = {paper_key(p) for p in filtered}
+        rejected = [p for p in candidates if paper_key(p) not in selected]
+        filtered.extend(heapq.nlargest((min_results * 2) - len(filtered), rejected, key=get_citations))
+    return filtered
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    rng = random.Random(42)
+    vocab = make_vocabulary(5000, rng)
+
+    print(f"{'candidates':>10} {'keywords':>9} {'legacy (ms)':>12} {'current (ms)':>13} {'speedup':>8}")
+    for n in (500, 2000, 5000):
+        candidates = make_candidates(n, vocab, rng)
+        for k in (10, 100, 200, 500):
+            terms = make_terms(k, vocab, rng)
+            # Plant a few real matches
+            for p in rng.sample(candidates, 3):
+                p['abstract'] += " " + terms[0]
+            t_old, r_old = timed(legacy_filter, candidates, terms)
+            t_new, r_new = timed(current_filter, candidates, terms)
+            assert [p['paperId'] for p in r_old] == [p['paperId'] for p in r_new]
+            print(f"{n:>10} {k:>9} {t_old * 1000:>12.1f} {t_new * 1000:>13.1f} {t_old / t_new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Retry-rate benchmark for structured agent output. Requires a running Ollama server with the model pulled.
+
+Sends the same Student/Advisor prompts twice: once with the previous setup (format='json', prose field
+descriptions, _parse_json_robust only) and once constrained by the JSON Schemas in schemas.py.
+An attempt counts as a retry trigger when its output does not parse (previous setup) or does not
+parse and validate (schema setup).
+
+Usage: python benchmarks/bench_structured_output.py [--model qwen2.5:7b] [--trials 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import ollama
+from agents.base import BaseAgent
+
+VIEWPOINT = "Reducing hallucination in retrieval-augmented LLMs by verifying generated claims against retrieved passages."
+PAPER_TITLE = "Self-RAG: Learning to Retrieve, Generate, and Critique through Self-Reflection"
+PAPER_TEXT = (
+    "Despite their remarkable capabilities, large language models (LLMs) often produce responses containing "
+    "factual inaccuracies due to their sole reliance on the parametric knowledge they encapsulate. "
+    "Retrieval-Augmented Generation (RAG), an ad hoc approach that augments LMs with retrieval of relevant "
+    "knowledge, decreases such issues. We introduce Self-Reflective Retrieval-Augmented Generation (Self-RAG) "
+    "that enhances an LM's quality and factuality through retrieval and self-reflection. Our framework trains a "
+    "single arbitrary LM that adaptively retrieves passages on-demand, and generates and reflects on retrieved "
+    "passages and its own generations using special tokens, called reflection tokens. Experiments show that "
+    "Self-RAG (7B and 13B parameters) significantly outperforms state-of-the-art LLMs and retrieval-augmented "
+    "models on a diverse set of tasks, including Open-domain QA, reasoning and fact verification tasks."
+)
+
+def prompts(student):
+    """(name, schema, messages) for each structured prompt, built through the agents' own methods."""
+    captured = []
+    def capture(messages, schema=None, **kwargs):
+        captured.append((schema, messages))
+        return None
+    analysis = {'scores': {'relevance': 8, 'innovation': 7, 'reliability': 7, 'potential': 8, 'total': 8},
+                'match_reasoning': "Self-reflection tokens critique retrieved passages.", 'evidence_quotes': []}
+    student.chat = capture
+    student.analyze_user_input(VIEWPOINT)
+    student.analyze_initial(VIEWPOINT, PAPER_TITLE, PAPER_TEXT)
+    student.generate_investigation_queries(["Does Self-RAG verify claims against passages?"], VIEWPOINT)
+    student.revise_analysis(analysis, "Reflection tokens judge passage relevance, not claim verification.", PAPER_TEXT)
+    del student.chat
+
+    from agents.advisor import AdvisorAgent
+    advisor = AdvisorAgent(student.model)
+    advisor.chat = capture
+    advisor.review_analysis(analysis, PAPER_TEXT, debate_round=1)
+    advisor.review_synthesis({'gap_analysis': "No claim-level verification."}, [{'paper': {'title': PAPER_TITLE}}])
+
+    names = ['analyze_user_input', 'analyze_initial', 'generate_investigation_queries', 'revise_analysis',
+             'review_analysis', 'review_synthesis']
+    return [(name, schema, messages) for name, (schema, messages) in zip(names, captured)]
+
+def run(agent, model, schema, messages):
+    start = time.perf_counter()
+    content = ollama.chat(model=model, messages=messages, format=schema or 'json')['message']['content']
+    elapsed = time.perf_counter() - start
+    try:
+        ok = agent._decode(content, True, schema) is not None
+    except ValueError:
+        ok = False
+    return ok, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="qwen2.5:7b")
+    parser.add_argument("--trials", type=int, default=5)
+    args = parser.parse_args()
+
+    agent = BaseAgent(args.model)
+    from agents.student import StudentAgent
+    cases = prompts(StudentAgent(args.model))
+
+    print(f"{'prompt':<32} {'json retry rate':>16} {'schema retry rate':>18} {'json (s)':>9} {'schema (s)':>11}")
+    totals = {'json': [0, 0], 'schema': [0, 0]}
+    for name, schema, messages in cases:
+        row = {}
+        for mode, fmt in (('json', None), ('schema', schema)):
+            failures, elapsed = 0, 0.0
+            for _ in range(args.trials):
+                ok, seconds = run(agent, args.model, fmt, messages)
+                failures += not ok
+                elapsed += seconds
+            totals[mode][0] += failures
+            totals[mode][1] += args.trials
+            row[mode] = (failures / args.trials, elapsed / args.trials)
+        print(f"{name:<32} {row['json'][0]:>16.0%} {row['schema'][0]:>18.0%} {row['json'][1]:>9.1f} {row['schema'][1]:>11.1f}")
+    print(f"{'overall':<32} {totals['json'][0] / totals['json'][1]:>16.0%} {totals['schema'][0] / totals['schema'][1]:>18.0%}")
+
+if __name__ == "__main__":
+    main()
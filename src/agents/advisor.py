@@ -1,8 +1,15 @@
 from .base import BaseAgent
 import json
+import schemas
+from analysis_patch import diff_analysis
 
 class AdvisorAgent(BaseAgent):
-    def review_analysis(self, student_analysis, paper_content, debate_round=0):
+    def review_analysis(self, student_analysis, paper_content, debate_round=0, session=None, delta=False):
+        """
+        With a DebateSession, the paper comes from the session prefix and earlier rounds from its history.
+        With delta=True the review names the fields to revise in 'target_fields', and inside a session
+        only the fields changed since the last reviewed analysis are sent.
+        """
         current_score = 0
         if 'scores' in student_analysis and isinstance(student_analysis['scores'], dict):
             current_score = student_analysis['scores'].get('relevance', 0)
@@ -17,13 +24,32 @@ class AdvisorAgent(BaseAgent):
         else:
             focus_instruction = "Phase 2: CRITICAL REVIEW. Look for fatal flaws, missed limitations, or reasons to reject. Verify if the 'match_reasoning' is logical."
 
+        if session is None:
+            paper_text = f"Paper Content Fragment: {paper_content[:10000]}"
+        else:
+            paper_text = "Paper Content Fragment: see the paper at the start of this conversation."
+
+        reviewed = session.seen.get('advisor') if (session is not None and delta) else None
+        if reviewed is not None:
+            changes = diff_analysis(reviewed, student_analysis)
+            analysis_text = f"Student Analysis (only the fields changed since your last review; the rest is unchanged): {json.dumps(changes)}"
+        else:
+            analysis_text = f"Student Analysis: {json.dumps(student_analysis)}"
+
+        target_text = ""
+        target_output = ""
+        if delta:
+            target_text = ("- TARGETING: List in 'target_fields' the analysis fields the student must revise "
+                           f"(any of: {', '.join(schemas.ANALYSIS_FIELDS)}). Leave it empty if nothing needs to change.")
+            target_output = ',\n            "target_fields": ["field name", ...] (Fields the student must revise)'
+
         prompt = f"""
         You are a highly critical, top-tier conference reviewer (e.g. NeurIPS, ICML).
         Current Debate Round: {debate_round + 1}
         Focus: {focus_instruction}
         
-        Student Analysis: {json.dumps(student_analysis)}
-        Paper Content Fragment: {paper_content[:10000]}
+        {analysis_text}
+        {paper_text}
         
         Task:
         1. EVIDENCE CHECK: Verify if every claim in 'problem_def' and 'methodology' is supported by the text.
@@ -47,19 +73,26 @@ class AdvisorAgent(BaseAgent):
           - If you are not satisfied, suspect the student is missing something, OR if the paper seems potentially relevant but lacks evidence, ASK QUESTIONS.
           - Do NOT just reject if a simple clarification could save the paper.
           - List specific questions in the 'questions' field that the student needs to answer (possibly by searching more).
+        {target_text}
         
         Output JSON:
         {{
             "is_approved": boolean,
             "critique": "Specific, harsh, evidence-based feedback focusing on {focus_instruction}...",
             "score_correction": int or null (If you disagree with the 'relevance' score, provide your corrected integer value 0-10. Otherwise null),
-            "questions": ["Question 1", "Question 2"] (Optional: List of questions for the student to investigate further)
+            "questions": ["Question 1", "Question 2"] (Optional: List of questions for the student to investigate further){target_output}
         }}
         """
         
-        response = self.chat([{'role': 'user', 'content': prompt}])
+        if session is None:
+            messages = [{'role': 'user', 'content': prompt}]
+        else:
+            messages = session.messages('advisor', prompt)
+        response = self.chat(messages, schema=schemas.TARGETED_REVIEW if delta else schemas.REVIEW)
         
         if response and isinstance(response, dict):
+            if session is not None:
+                session.record('advisor', prompt, response, seen=student_analysis)
             return response
             
         return {"is_approved": False, "critique": "System Error: Advisor failed to generate valid critique (JSON parsing error or timeout)."}
@@ -91,7 +124,7 @@ class AdvisorAgent(BaseAgent):
         }}
         """
         
-        response = self.chat([{'role': 'user', 'content': prompt}])
+        response = self.chat([{'role': 'user', 'content': prompt}], schema=schemas.SYNTHESIS_REVIEW)
         
         if response and isinstance(response, dict):
             return response
@@ -3,33 +3,181 @@ import json
 import re
 import time
 import ast
+import threading
+from llm_governor import get_governor
+from cache import get_response_cache
+from json_stream import IncrementalJSONParser
+from schemas import SchemaError, validate
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+METRIC_FIELDS = ('prompt_eval_count', 'prompt_eval_duration', 'eval_count', 'eval_duration', 'total_duration')
+
+_stats = {'requests': 0, 'attempts': 0, 'retries': 0, 'parse_failures': 0, 'schema_failures': 0, 'failed': 0}
+_stats_lock = threading.Lock()
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+def chat_stats(since=None):
+    """
+    Process-wide counters for BaseAgent.chat: requests, Ollama attempts, retries and why outputs were rejected.
+    With `since` (an earlier chat_stats() result), only what was counted after it.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    if since:
+        stats = {key: value - since.get(key, 0) for key, value in stats.items()}
+    stats['retry_rate'] = stats['retries'] / stats['requests'] if stats['requests'] else 0.0
+    return stats
+
+_llm_time = threading.local()
+
+def llm_seconds():
+    """Seconds the current thread has spent inside LLM governor slots (time queued for a slot is not counted)."""
+    return getattr(_llm_time, 'seconds', 0.0)
+
+def model_digest(model):
+    """Digest of the locally installed weights for `model` (None if Ollama can't be asked)."""
+    with _digests_lock:
+        if model in _digests:
+            return _digests[model]
+    digest = None
+    try:
+        for entry in ollama.list()['models']:
+            name = entry.get('model') or entry.get('name')
+            if name == model or name == f"{model}:latest":
+                digest = entry.get('digest')
+                break
+    except Exception:
+        pass
+    with _digests_lock:
+        _digests[model] = digest
+    return digest
 
 class BaseAgent:
-    def __init__(self, model="qwen2.5:7b"):
+    def __init__(self, model="qwen2.5:7b", governor=None, response_cache=None, stream=False, keep_alive=None):
         self.model = model
+        # How long Ollama keeps the model loaded after each request (None = server default)
+        self.keep_alive = keep_alive
+        # Optional on_metrics(model, metrics) hook for Ollama's per-request token counts and timings
+        self.on_metrics = None
+        # Stream completions and stop as soon as the JSON object closes
+        self.stream = stream
+        # None = the process-wide governor, so every agent and pipeline shares one cap per model
+        self.governor = governor
+        # None = the process-wide response cache, which is only enabled with FINDURCITE_LLM_CACHE=1
+        self.response_cache = response_cache
 
-    def chat(self, messages, format_type='json', retries=3):
+    def chat(self, messages, format_type='json', retries=3, priority=None, stream=None, on_field=None, schema=None):
         """
         Send chat request to Ollama with retries and robust JSON parsing.
+        Requests go through the LLM governor; `priority` defaults to the class set with llm_priority().
+        With a response cache, an identical earlier request (same model weights, format and messages) is replayed.
+        In streaming mode (stream=True, or the agent's default) JSON output is parsed while it is generated:
+        on_field(key, value) fires as each top-level field completes, and generation stops once the object closes.
+        With a JSON `schema` (see schemas.py), Ollama constrains the output to it and the parsed result is
+        validated and coerced against it; output that still does not parse or validate is retried.
         """
+        stream = self.stream if stream is None else stream
+        if schema is not None:
+            format_type = schema
+        expects_json = schema is not None or format_type == 'json'
+        _count(requests=1)
+
+        cache = self.response_cache or get_response_cache()
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(self.model, messages, format_type, digest=model_digest(self.model))
+            cached = cache.get(cache_key)
+            if cached is not None:
+                try:
+                    result = self._decode(cached, expects_json, schema)
+                    if result is not None:
+                        return result
+                except ValueError:
+                    pass
+
+        governor = self.governor or get_governor()
         for attempt in range(retries):
+            if attempt:
+                _count(retries=1)
+            _count(attempts=1)
             try:
-                response = ollama.chat(model=self.model, messages=messages, format=format_type)
-                content = response['message']['content']
+                with governor.slot(self.model, priority):
+                    started = time.perf_counter()
+                    try:
+                        if stream and expects_json:
+                            content = self._chat_streaming(messages, format_type, on_field)
+                        else:
+                            response = ollama.chat(model=self.model, messages=messages, format=format_type, **self._request_options())
+                            content = response['message']['content']
+                            self._report_metrics(response)
+                    finally:
+                        _llm_time.seconds = llm_seconds() + time.perf_counter() - started
                 
-                if format_type == 'json':
-                    return self._parse_json_robust(content)
-                
-                return content
+                result = self._decode(content, expects_json, schema)
+                if cache_key is not None and result is not None:
+                    cache.set(cache_key, content)
+                return result
                 
             except Exception as e:
                 print(f"[BaseAgent] Error (Attempt {attempt+1}/{retries}): {e}")
                 if attempt < retries - 1:
-                    time.sleep(1)
+                    if not isinstance(e, ValueError):
+                        time.sleep(1)
                 else:
+                    _count(failed=1)
                     return None
         return None
 
+    def _decode(self, content, expects_json, schema):
+        """Parse a completion; with a schema, raise ValueError for output that has to be regenerated."""
+        if not expects_json:
+            return content
+        result = self._parse_json_robust(content)
+        if schema is None:
+            if result is None:
+                _count(parse_failures=1)
+            return result
+        if result is None:
+            _count(parse_failures=1)
+            raise ValueError("Response is not valid JSON")
+        try:
+            return validate(result, schema)
+        except SchemaError:
+            _count(schema_failures=1)
+            raise
+
+    def _report_metrics(self, response):
+        # prompt_eval_count only counts prompt tokens Ollama had to prefill, i.e. not served from its prefix cache
+        if self.on_metrics:
+            self.on_metrics(self.model, {key: response.get(key) for key in METRIC_FIELDS})
+
+    def _request_options(self):
+        if self.keep_alive is None:
+            return {}
+        return {'keep_alive': self.keep_alive}
+
+    def _chat_streaming(self, messages, format_type, on_field=None):
+        parser = IncrementalJSONParser(on_field=on_field)
+        chunks = ollama.chat(model=self.model, messages=messages, format=format_type, stream=True, **self._request_options())
+        try:
+            for chunk in chunks:
+                if chunk.get('done'):
+                    self._report_metrics(chunk)
+                if parser.feed(chunk['message']['content']):
+                    break
+        finally:
+            # Closing the stream drops the connection, which makes Ollama stop generating
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+        return parser.text
+
     def _parse_json_robust(self, text):
         """
         Clean and parse JSON from LLM output with multi-stage recovery.
@@ -0,0 +1,48 @@
+import copy
+import json
+
+class DebateSession:
+    """
+    Conversation state for the debate rounds about one paper.
+
+    The paper text sits in a single system message shared by the Student and the Advisor, and each
+    agent's rounds are appended after it as user/assistant turns. Every request of the debate therefore
+    starts with the same tokens, so Ollama serves the paper from its prompt cache instead of prefilling
+    it again on every round.
+    """
+    def __init__(self, paper_title, paper_content, max_chars=10000):
+        self.prefix = {
+            'role': 'system',
+            'content': (
+                "You are taking part in a review debate between a research student and their advisor about the paper below. "
+                "Every instruction that follows refers to this paper.\n\n"
+                f"Paper: {paper_title}\n"
+                f"Paper Content Fragment: {paper_content[:max_chars]}"
+            ),
+        }
+        self.turns = {}
+        self.seen = {}
+
+    def messages(self, role, prompt):
+        """Messages for the next request of `role`: shared prefix, that role's earlier turns, then `prompt`."""
+        return [self.prefix] + self.turns.get(role, []) + [{'role': 'user', 'content': prompt}]
+
+    def record(self, role, prompt, response, seen=None):
+        """
+        Append a completed round; failed rounds are not recorded so they are simply asked again.
+        `seen` is the state the role has been shown so far (e.g. the analysis an Advisor reviewed),
+        so later prompts can send only what changed since.
+        """
+        self.turns.setdefault(role, []).extend([
+            {'role': 'user', 'content': prompt},
+            {'role': 'assistant', 'content': json.dumps(response, ensure_ascii=False)},
+        ])
+        if seen is not None:
+            self.seen[role] = copy.deepcopy(seen)
+
+    def last_response(self, role):
+        """The last recorded answer of `role`, or None."""
+        turns = self.turns.get(role)
+        if not turns:
+            return None
+        return json.loads(turns[-1]['content'])
@@ -1,8 +1,10 @@
 import json
 from .base import BaseAgent
+import schemas
+from analysis_patch import apply_patch
 
 class StudentAgent(BaseAgent):
-    def analyze_initial(self, user_context, paper_title, paper_content):
+    def analyze_initial(self, user_context, paper_title, paper_content, on_field=None):
         truncated_text = paper_content[:30000]
         
         prompt = f"""
@@ -44,25 +46,40 @@ class StudentAgent(BaseAgent):
         - Be critical. 9-10 is reserved for seminal works.
         """
         
-        response = self.chat([{'role': 'user', 'content': prompt}])
+        response = self.chat([{'role': 'user', 'content': prompt}], on_field=on_field, schema=schemas.INITIAL_ANALYSIS)
         if response and isinstance(response, dict):
             return response
         
         print(f"[StudentAgent] Analyze Initial Failed. Response type: {type(response)}")
         return {}
 
-    def revise_analysis(self, original_analysis, advisor_critique, paper_content, new_evidence=None):
+    def revise_analysis(self, original_analysis, advisor_critique, paper_content, new_evidence=None, on_field=None, session=None):
+        """With a DebateSession, the paper comes from the session prefix and earlier rounds from its history."""
         evidence_text = ""
         if new_evidence:
             evidence_text = f"\nNew Evidence from Search:\n{new_evidence}\n"
+
+        if session is None:
+            analysis_text = f"Original Analysis: {json.dumps(original_analysis)}"
+            paper_text = f"Paper Content Fragment: {paper_content[:10000]}"
+        else:
+            # Your own previous answer is already part of the conversation unless it was changed since
+            # ('relevance_score' is only a copy of scores.relevance added by the orchestrator)
+            previous = session.last_response('student')
+            current = {k: v for k, v in original_analysis.items() if k != 'relevance_score'}
+            if previous is not None and current == {k: v for k, v in previous.items() if k != 'relevance_score'}:
+                analysis_text = "Original Analysis: your previous answer above."
+            else:
+                analysis_text = f"Original Analysis: {json.dumps(original_analysis)}"
+            paper_text = "Paper Content Fragment: see the paper at the start of this conversation."
             
         prompt = f"""
         You are a research student. Your advisor has critiqued your initial analysis and asked questions.
         
-        Original Analysis: {json.dumps(original_analysis)}
+        {analysis_text}
         Advisor Critique: {advisor_critique}
         {evidence_text}
-        Paper Content Fragment: {paper_content[:10000]}
+        {paper_text}
         
         Task: Revise the analysis to address the critique and new evidence.
         Step 1: REFLECTION. Think deeply about the critique and any new findings.
@@ -80,13 +97,118 @@ class StudentAgent(BaseAgent):
         Output the full updated JSON, including 'defense' and the 'scores' object.
         """
         
-        response = self.chat([{'role': 'user', 'content': prompt}])
+        if session is None:
+            messages = [{'role': 'user', 'content': prompt}]
+        else:
+            messages = session.messages('student', prompt)
+        response = self.chat(messages, on_field=on_field, schema=schemas.REVISED_ANALYSIS)
         if response and isinstance(response, dict):
+            if session is not None:
+                session.record('student', prompt, response)
             return response
             
         print(f"[StudentAgent] Revise Analysis Failed. Response type: {type(response)}")
         return original_analysis
 
+    def revise_analysis_patch(self, original_analysis, advisor_critique, target_fields, paper_content, new_evidence=None, session=None):
+        """
+        Delta variant of revise_analysis: only the fields the advisor targeted (plus the scores) are sent,
+        and the answer is a patch {'defense': ..., 'changes': {...}} holding just the changed fields.
+        Returns the patch, or None when no valid patch was produced.
+        """
+        evidence_text = ""
+        if new_evidence:
+            evidence_text = f"\nNew Evidence from Search:\n{new_evidence}\n"
+
+        fields = [f for f in target_fields if f in original_analysis] or [f for f in schemas.ANALYSIS_FIELDS if f in original_analysis]
+        if 'scores' not in fields:
+            fields.append('scores')
+        current = {f: original_analysis.get(f) for f in fields}
+
+        if session is None:
+            paper_text = f"Paper Content Fragment: {paper_content[:10000]}"
+        else:
+            paper_text = "Paper Content Fragment: see the paper at the start of this conversation."
+
+        prompt = f"""
+        You are a research student. Your advisor has critiqued your analysis and asked you to revise specific fields.
+        
+        Fields To Revise (current values): {json.dumps(current)}
+        Advisor Critique: {advisor_critique}
+        {evidence_text}
+        {paper_text}
+        
+        Task: Revise ONLY the fields listed above to address the critique and new evidence.
+        Step 1: REFLECTION. Think deeply about the critique and any new findings.
+        Step 2: REVISION. Decide which of the listed fields must change.
+        
+        Guidelines:
+        - You MUST output a 'defense' field explaining your response to the critique and how new evidence supports/refutes it.
+        - If the advisor points out that the paper is IRRELEVANT or lacks evidence, you MUST Lower 'scores.relevance' (e.g., to 2 or 3).
+        - If any score changes, also output the recalculated 'scores.total'.
+        - Be honest: if you cannot defend the relevance, accept the advisor's view.
+        - All scores MUST be integers between 0 and 10.
+        
+        Output JSON with ONLY the changed fields in 'changes' (omit unchanged fields and unchanged scores):
+        {{
+            "defense": "...",
+            "changes": {{"field name": new value, "scores": {{"relevance": int, "total": int}}}}
+        }}
+        """
+
+        if session is None:
+            messages = [{'role': 'user', 'content': prompt}]
+        else:
+            messages = session.messages('student', prompt)
+        # A single attempt: an unusable patch falls back to a full revision rather than a retry
+        response = self.chat(messages, schema=schemas.ANALYSIS_PATCH, retries=1)
+        if response and isinstance(response, dict) and apply_patch(original_analysis, response) is not None:
+            if session is not None:
+                session.record('student', prompt, response)
+            return response
+
+        print(f"[StudentAgent] Revise Analysis Patch Failed. Response type: {type(response)}")
+        return None
+
+    def screen_abstracts(self, user_context, papers, max_abstract_chars=1500):
+        """
+        Score many abstracts in one call. Returns one relevance score (0-10) per paper, in order,
+        with None for papers the model left out.
+        """
+        listing = "\n\n".join(
+            f"[P{i + 1}] {p.get('title', '')}\nAbstract: {(p.get('abstract') or '')[:max_abstract_chars]}"
+            for i, p in enumerate(papers)
+        )
+        prompt = f"""
+        You are a research student screening search results for your research context.
+        
+        Context: {user_context}
+        
+        Papers:
+        {listing}
+        
+        Task: Rate how strictly each paper addresses the core problem of the context (relevance, 0-10).
+        - 0-3: off-topic or only shares keywords.
+        - 4-6: related problem or a method that could transfer.
+        - 7-10: directly addresses the core problem.
+        Rate every paper independently and include every ID exactly once.
+        
+        Output JSON only:
+        {{
+            "scores": [{{"id": "P1", "relevance": int}}, ...]
+        }}
+        """
+        response = self.chat([{'role': 'user', 'content': prompt}], schema=schemas.BATCH_SCREENING)
+        scores = [None] * len(papers)
+        if response and isinstance(response, dict):
+            for entry in response.get('scores', []):
+                paper_id = entry['id'].strip().strip('[]').upper()
+                if paper_id.startswith('P') and paper_id[1:].isdigit():
+                    index = int(paper_id[1:]) - 1
+                    if 0 <= index < len(papers):
+                        scores[index] = entry['relevance']
+        return scores
+
     def generate_investigation_queries(self, advisor_questions, context):
         prompt = f"""
         You are a research student. Your advisor has asked challenging questions about your analysis.
@@ -102,7 +224,7 @@ class StudentAgent(BaseAgent):
             "queries": ["query 1", "query 2", "query 3"]
         }}
         """
-        response = self.chat([{'role': 'user', 'content': prompt}])
+        response = self.chat([{'role': 'user', 'content': prompt}], schema=schemas.INVESTIGATION_QUERIES)
         if response and isinstance(response, dict):
             return response.get('queries', [])
         return []
@@ -134,7 +256,7 @@ class StudentAgent(BaseAgent):
         - english_keywords: [List of English keywords for filtering]
         """
         
-        response = self.chat([{'role': 'user', 'content': prompt}])
+        response = self.chat([{'role': 'user', 'content': prompt}], schema=schemas.USER_INPUT_ANALYSIS)
         if response and isinstance(response, dict):
             return response
             
@@ -0,0 +1,36 @@
+import copy
+import schemas
+
+# Added by the orchestrator from scores.relevance, never part of what the agents exchange
+_DERIVED_FIELDS = {'relevance_score'}
+
+def diff_analysis(old, new):
+    """Top-level fields of `new` that differ from `old` (removed fields are not reported)."""
+    return {k: v for k, v in new.items() if k not in _DERIVED_FIELDS and old.get(k) != v}
+
+def apply_patch(analysis, patch):
+    """
+    Merge a Student patch ({'defense': ..., 'changes': {...}}) into a copy of `analysis`.
+    'scores' is merged score by score, other fields are replaced. Returns None when the patch is
+    unusable (wrong shape or fields that are not part of an analysis), so the caller can fall back
+    to a full revision.
+    """
+    if not isinstance(patch, dict) or not isinstance(patch.get('changes'), dict):
+        return None
+    if not isinstance(patch.get('defense'), str) or not patch['defense'].strip():
+        return None
+    changes = patch['changes']
+    if any(field not in schemas.ANALYSIS_FIELDS for field in changes):
+        return None
+
+    revised = copy.deepcopy(analysis)
+    for field, value in changes.items():
+        if field == 'scores':
+            if not isinstance(value, dict):
+                return None
+            scores = revised.get('scores') if isinstance(revised.get('scores'), dict) else {}
+            revised['scores'] = dict(scores, **value)
+        else:
+            revised[field] = value
+    revised['defense'] = patch['defense']
+    return revised
@@ -1,49 +1,525 @@
 import json
 import os
 import hashlib
+import sqlite3
+import threading
+import time
 from datetime import datetime
+from utils import get_output_dir
 
-class AnalysisCache:
-    def __init__(self, cache_file="analysis_cache.json"):
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters shared by all cache backends."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def record(self, name, count=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0
+            }
+
+class JSONCacheBackend:
+    """
+    Whole-file JSON key/value store. Kept for environments where SQLite is unavailable.
+    Supports the same TTL / LRU budget as SQLiteCacheBackend, enforced in memory.
+    """
+    def __init__(self, cache_file, default_ttl=None, max_entries=None, max_bytes=None):
         self.cache_file = cache_file
-        self.cache = self._load_cache()
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._data = self._load()
 
-    def _load_cache(self):
+    def _load(self):
         if os.path.exists(self.cache_file):
             try:
                 with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    raw = json.load(f)
             except Exception:
                 return {}
+            now = time.time()
+            data = {}
+            for key, entry in raw.items():
+                # Legacy files stored bare values
+                if not (isinstance(entry, dict) and set(entry.keys()) == {'value', 'size', 'accessed_at', 'expires_at'}):
+                    entry = self._make_entry(entry, self.default_ttl, now)
+                data[key] = entry
+            return data
         return {}
 
-    def _save_cache(self):
+    def _save(self):
+        tmp_file = self.cache_file + ".tmp"
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
         except Exception:
             pass
 
+    def _make_entry(self, value, ttl, now):
+        return {
+            'value': value,
+            'size': len(json.dumps(value, ensure_ascii=False).encode('utf-8')),
+            'accessed_at': now,
+            'expires_at': (now + ttl) if ttl else None
+        }
+
+    def _evict(self, now):
+        expired = [k for k, e in self._data.items() if e['expires_at'] is not None and e['expires_at'] <= now]
+        for k in expired:
+            del self._data[k]
+        if expired:
+            self.stats.record('expirations', len(expired))
+
+        by_age = None
+        if self.max_entries and len(self._data) > self.max_entries:
+            by_age = sorted(self._data, key=lambda k: self._data[k]['accessed_at'])
+            overflow = len(self._data) - self.max_entries
+            for k in by_age[:overflow]:
+                del self._data[k]
+            by_age = by_age[overflow:]
+            self.stats.record('evictions', overflow)
+
+        if self.max_bytes:
+            total = sum(e['size'] for e in self._data.values())
+            if total > self.max_bytes:
+                if by_age is None:
+                    by_age = sorted(self._data, key=lambda k: self._data[k]['accessed_at'])
+                evicted = 0
+                for k in by_age:
+                    if total <= self.max_bytes:
+                        break
+                    total -= self._data.pop(k)['size']
+                    evicted += 1
+                self.stats.record('evictions', evicted)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.record('misses')
+                return None
+            now = time.time()
+            if entry['expires_at'] is not None and entry['expires_at'] <= now:
+                del self._data[key]
+                self.stats.record('expirations')
+                self.stats.record('misses')
+                return None
+            entry['accessed_at'] = now
+            self.stats.record('hits')
+            return entry['value']
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            now = time.time()
+            self._data[key] = self._make_entry(value, ttl if ttl is not None else self.default_ttl, now)
+            self._evict(now)
+            self._save()
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry['expires_at'] is None or entry['expires_at'] > time.time())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get_stats(self):
+        stats = self.stats.snapshot()
+        with self._lock:
+            stats['entries'] = len(self._data)
+            stats['bytes'] = sum(e['size'] for e in self._data.values())
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+
+    def close(self):
+        pass
+
+class SQLiteCacheBackend:
+    """
+    Transactional key/value store on SQLite in WAL mode.
+    Each write is a single-row upsert, so concurrent threads and processes never rewrite the whole cache.
+    Entries carry an optional expiry (per-entry TTL, falling back to `default_ttl`), and the store is kept
+    within `max_entries` / `max_bytes` by evicting the least recently used rows.
+    If `migrate_from` points to a legacy JSON cache, it is imported once and renamed to *.migrated.
+    """
+    def __init__(self, db_path, migrate_from=None, timeout=30, default_ttl=None,
+                 max_entries=None, max_bytes=None, evict_interval=16):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._connections = []
+        self._conn_lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        self._init_schema()
+
+        if migrate_from:
+            self._migrate_json(migrate_from)
+
+        self._evict()
+
+    def _get_conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+            with self._conn_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _init_schema(self):
+        conn = self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL DEFAULT 0,"
+                " accessed_at REAL NOT NULL DEFAULT 0,"
+                " expires_at REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+            if 'accessed_at' not in columns:
+                # Upgrade stores created before TTL/LRU support (key, value, updated_at in julian days)
+                conn.execute("ALTER TABLE cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE cache ADD COLUMN expires_at REAL")
+                conn.execute("UPDATE cache SET size = length(CAST(value AS BLOB)), accessed_at = (updated_at - 2440587.5) * 86400.0")
+                if self.default_ttl:
+                    conn.execute("UPDATE cache SET expires_at = accessed_at + ?", (self.default_ttl,))
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _migrate_json(self, json_path):
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception:
+            legacy = None
+
+        if isinstance(legacy, dict) and legacy:
+            now = time.time()
+            expires_at = (now + self.default_ttl) if self.default_ttl else None
+            rows = []
+            for k, v in legacy.items():
+                payload = json.dumps(v, ensure_ascii=False)
+                rows.append((k, payload, len(payload.encode('utf-8')), now, expires_at))
+            conn = self._get_conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO cache (key, value, size, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                return
+
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except OSError:
+            pass
+
+    def _evict(self):
+        if not (self.max_entries or self.max_bytes):
+            conn = self._get_conn()
+            cur = conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            if cur.rowcount > 0:
+                self.stats.record('expirations', cur.rowcount)
+            return
+
+        conn = self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            if cur.rowcount > 0:
+                self.stats.record('expirations', cur.rowcount)
+
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            evicted = 0
+            if self.max_entries and count > self.max_entries:
+                overflow = count - self.max_entries
+                cur = conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+                evicted += cur.rowcount
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+            if self.max_bytes and total > self.max_bytes:
+                victims = []
+                for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at ASC"):
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+                evicted += len(victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if evicted:
+            self.stats.record('evictions', evicted)
+
+    def get(self, key):
+        conn = self._get_conn()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats.record('misses')
+            return None
+
+        now = time.time()
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, now))
+            self.stats.record('expirations')
+            self.stats.record('misses')
+            return None
+
+        try:
+            data = json.loads(value)
+        except ValueError:
+            self.stats.record('misses')
+            return None
+
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats.record('hits')
+        return data
+
+    def set(self, key, value, ttl=None):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        if ttl is None:
+            ttl = self.default_ttl
+        expires_at = (now + ttl) if ttl else None
+        self._get_conn().execute(
+            "INSERT INTO cache (key, value, size, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "accessed_at = excluded.accessed_at, expires_at = excluded.expires_at",
+            (key, payload, len(payload.encode('utf-8')), now, expires_at)
+        )
+
+        with self._conn_lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= self.evict_interval
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self._evict()
+
+    def delete(self, key):
+        self._get_conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __contains__(self, key):
+        row = self._get_conn().execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._get_conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get_stats(self):
+        stats = self.stats.snapshot()
+        count, total = self._get_conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        stats['entries'] = count
+        stats['bytes'] = total
+        return stats
+
+    def clear(self):
+        self._get_conn().execute("DELETE FROM cache")
+
+    def close(self):
+        with self._conn_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+class AnalysisCache:
+    def __init__(self, cache_file="analysis_cache.json", ttl=30 * 24 * 3600, max_entries=5000, max_bytes=200 * 1024 * 1024):
+        self.cache_file = cache_file
+        self.cache = SQLiteCacheBackend(
+            os.path.splitext(cache_file)[0] + ".db",
+            migrate_from=cache_file,
+            default_ttl=ttl,
+            max_entries=max_entries,
+            max_bytes=max_bytes
+        )
+
     def _generate_key(self, viewpoint, paper_abstract):
         content = f"{viewpoint.strip()}|{paper_abstract.strip()}"
         return hashlib.md5(content.encode('utf-8')).hexdigest()
 
     def get(self, viewpoint, paper_abstract):
         key = self._generate_key(viewpoint, paper_abstract)
-        entry = self.cache.get(key)
+        try:
+            entry = self.cache.get(key)
+        except Exception:
+            return None
         if entry:
             return entry.get('data')
         return None
 
     def set(self, viewpoint, paper_abstract, data):
         key = self._generate_key(viewpoint, paper_abstract)
-        self.cache[key] = {
-            'timestamp': datetime.now().isoformat(),
-            'data': data
-        }
-        self._save_cache()
+        try:
+            self.cache.set(key, {
+                'timestamp': datetime.now().isoformat(),
+                'data': data
+            })
+        except Exception:
+            pass
+
+    def stats(self):
+        return self.cache.get_stats()
 
     def clear(self):
-        self.cache = {}
+        self.cache.clear()
         if os.path.exists(self.cache_file):
             os.remove(self.cache_file)
+
+class LLMResponseCache:
+    """
+    Content-addressed store of raw LLM completions. The key hashes the model name, the model digest
+    (so re-pulled weights miss), the request options, the output format and the full message list.
+    """
+    def __init__(self, db_path=None, ttl=None, max_entries=20000, max_bytes=500 * 1024 * 1024):
+        if db_path is None:
+            cache_dir = os.path.join(get_output_dir(), ".cache")
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            db_path = os.path.join(cache_dir, "llm_responses.db")
+        self.cache = SQLiteCacheBackend(db_path, default_ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+    def make_key(self, model, messages, format_type=None, options=None, digest=None):
+        request = {
+            'model': model,
+            'digest': digest,
+            'format': format_type,
+            'options': options or {},
+            'messages': [{'role': m.get('role'), 'content': m.get('content')} for m in messages],
+        }
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        try:
+            entry = self.cache.get(key)
+        except Exception:
+            return None
+        if entry:
+            return entry.get('content')
+        return None
+
+    def set(self, key, content):
+        try:
+            self.cache.set(key, {
+                'timestamp': datetime.now().isoformat(),
+                'content': content
+            })
+        except Exception:
+            pass
+
+    def stats(self):
+        return self.cache.get_stats()
+
+    def clear(self):
+        self.cache.clear()
+
+class EmbeddingCache:
+    """Embedding vectors keyed by a SHA-256 hash of the embedding model and the embedded text."""
+    def __init__(self, db_path=None, ttl=None, max_entries=200000, max_bytes=1024 * 1024 * 1024):
+        if db_path is None:
+            cache_dir = os.path.join(get_output_dir(), ".cache")
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            db_path = os.path.join(cache_dir, "embeddings.db")
+        self.cache = SQLiteCacheBackend(db_path, default_ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+    def make_key(self, model, text):
+        return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, model, text):
+        try:
+            entry = self.cache.get(self.make_key(model, text))
+        except Exception:
+            return None
+        if entry:
+            return entry.get('vector')
+        return None
+
+    def set(self, model, text, vector):
+        try:
+            self.cache.set(self.make_key(model, text), {'vector': vector})
+        except Exception:
+            pass
+
+    def stats(self):
+        return self.cache.get_stats()
+
+    def clear(self):
+        self.cache.clear()
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the process-wide LLM response cache, or None when it is disabled.
+    The cache is opt-in: set FINDURCITE_LLM_CACHE=1 (or pass a cache to the agents explicitly).
+    """
+    global _response_cache
+    if _response_cache is None and os.environ.get('FINDURCITE_LLM_CACHE', '').lower() in ('1', 'true', 'yes'):
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = LLMResponseCache()
+    return _response_cache
@@ -1,19 +1,112 @@
-import requests
+import os
 import time
+import hashlib
+import queue
+import threading
 import concurrent.futures
+import http_client
+from rate_limiter import get_rate_limiter
+from cache import SQLiteCacheBackend
+from dedup import normalize_title
+from utils import get_output_dir
+
+# Bump when the query or the result record shape changes so old entries are ignored.
+CODE_CACHE_VERSION = 1
+
+GRAPHQL_REPO_FIELDS = "... on Repository { name description url stargazerCount }"
 
 class CodeFinder:
-    def __init__(self):
+    def __init__(self, session=None, rate_limiter=None, cache_backend=None, stale_after=24 * 3600,
+                 cache_ttl=30 * 24 * 3600, cache_max_entries=20000, github_token=None, graphql_batch_size=10):
+        """
+        Results are cached per normalized title. Entries younger than `stale_after` seconds are served
+        without any request; older ones are revalidated with If-None-Match, and entries are dropped
+        entirely after `cache_ttl`.
+        With a GitHub token (argument or GITHUB_TOKEN), uncached titles are looked up in batches of
+        `graphql_batch_size` per GraphQL request.
+        """
+        self.session = session or http_client.get_session()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         self.github_api_url = "https://api.github.com/search/repositories"
+        self.github_graphql_url = "https://api.github.com/graphql"
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "FindUrCite-Research-Tool"
         }
+        self.github_token = github_token or os.environ.get("GITHUB_TOKEN")
+        self.rest_provider = 'github'
+        if self.github_token:
+            self.headers["Authorization"] = f"Bearer {self.github_token}"
+            self.rest_provider = 'github_authenticated'
+        self.graphql_batch_size = max(1, graphql_batch_size)
+        self.stale_after = stale_after
+        if cache_backend is None:
+            cache_dir = os.path.join(get_output_dir(), ".cache")
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            cache_backend = SQLiteCacheBackend(
+                os.path.join(cache_dir, "code_cache.db"),
+                default_ttl=cache_ttl,
+                max_entries=cache_max_entries
+            )
+        self.cache = cache_backend
+
+    def _get_cache_key(self, paper_title):
+        key = f"v{CODE_CACHE_VERSION}|github|{normalize_title(paper_title)}"
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key):
+        try:
+            entry = self.cache.get(key)
+        except Exception:
+            return None
+        if isinstance(entry, dict) and 'results' in entry:
+            return entry
+        return None
+
+    def _cache_set(self, key, results, etag):
+        try:
+            self.cache.set(key, {'results': results, 'etag': etag, 'fetched_at': time.time()})
+        except Exception:
+            pass
+
+    def cache_stats(self):
+        try:
+            return self.cache.get_stats()
+        except Exception:
+            return {}
+
+    def find_codes_parallel(self, paper_titles, batched=None):
+        """
+        Look up code for many titles. Fresh cache entries are served without any request. In batched mode
+        (default when a token is configured), titles that are missing from the cache or stale without an
+        ETag go through GraphQL; stale entries with a cached ETag are revalidated over REST, where a 304
+        is free. Anything GraphQL could not answer falls back to REST.
+        """
+        if batched is None:
+            batched = bool(self.github_token)
 
-    def find_codes_parallel(self, paper_titles):
         results = {}
+        rest_titles = []
+        needs_search = []
+        now = time.time()
+        for title in dict.fromkeys(paper_titles):
+            cached = self._cache_get(self._get_cache_key(title))
+            if cached and now - cached.get('fetched_at', 0) < self.stale_after:
+                results[title] = cached['results']
+            elif cached and cached.get('etag'):
+                rest_titles.append(title)
+            else:
+                needs_search.append(title)
+
+        if needs_search and batched and self.github_token:
+            answered = self.find_codes_batched(needs_search)
+            results.update(answered)
+            needs_search = [t for t in needs_search if t not in answered]
+        rest_titles.extend(needs_search)
+
         with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_title = {executor.submit(self.find_code, title): title for title in paper_titles}
+            future_to_title = {executor.submit(self.find_code, title): title for title in rest_titles}
             for future in concurrent.futures.as_completed(future_to_title):
                 title = future_to_title[future]
                 try:
@@ -23,9 +116,70 @@ class CodeFinder:
                     results[title] = []
         return results
 
-    def find_code(self, paper_title):
+    def find_codes_batched(self, paper_titles):
+        """
+        Search GitHub for several titles per GraphQL request (aliased `search` fields).
+        Returns {title: [records]} for the titles that were answered; requires a token.
+        """
+        results = {}
+        if not self.github_token:
+            return results
+
+        titles = list(dict.fromkeys(paper_titles))
+        for start in range(0, len(titles), self.graphql_batch_size):
+            batch = titles[start:start + self.graphql_batch_size]
+            results.update(self._graphql_search(batch))
+        return results
+
+    def _graphql_search(self, titles):
+        variables = {f"q{i}": f"{self._build_search_query(title)} sort:stars-desc" for i, title in enumerate(titles)}
+        declarations = ", ".join(f"${name}: String!" for name in variables)
+        fields = "\n".join(
+            f"{name}: search(query: ${name}, type: REPOSITORY, first: 5) {{ nodes {{ {GRAPHQL_REPO_FIELDS} }} }}"
+            for name in variables
+        )
+        payload = {"query": f"query({declarations}) {{\n{fields}\n}}", "variables": variables}
+
+        if not self.rate_limiter.acquire('github_graphql'):
+            return {}
+
+        try:
+            response = self.session.post(
+                self.github_graphql_url,
+                json=payload,
+                headers={"Authorization": f"Bearer {self.github_token}", "User-Agent": self.headers["User-Agent"]},
+                timeout=20
+            )
+            self.rate_limiter.update_from_response('github_graphql', response)
+            if response.status_code != 200:
+                return {}
+            data = response.json().get('data') or {}
+        except Exception:
+            return {}
+
+        results = {}
+        for i, title in enumerate(titles):
+            search = data.get(f"q{i}")
+            if not search:
+                # Missing alias: that sub-query errored; leave it to the REST fallback
+                continue
+            items = [{
+                'name': node.get('name', ''),
+                'description': node.get('description'),
+                'html_url': node.get('url', ''),
+                'stargazers_count': node.get('stargazerCount', 0)
+            } for node in search.get('nodes') or [] if node]
+            records = self._process_github_results(items, title)
+            self._cache_set(self._get_cache_key(title), records, None)
+            results[title] = records
+        return results
+
+    def _build_search_query(self, paper_title):
         clean_title = "".join([c if c.isalnum() or c.isspace() else " " for c in paper_title]).strip()
-        query = f'"{clean_title}" in:readme,description'
+        return f'"{clean_title}" in:readme,description'
+
+    def find_code(self, paper_title):
+        query = self._build_search_query(paper_title)
         
         params = {
             "q": query,
@@ -34,19 +188,41 @@ class CodeFinder:
             "per_page": 5
         }
         
+        cache_key = self._get_cache_key(paper_title)
+        cached = self._cache_get(cache_key)
+        if cached and time.time() - cached.get('fetched_at', 0) < self.stale_after:
+            return cached['results']
+
+        # Stale entries are still better than nothing if GitHub is unavailable or out of quota
+        fallback = cached['results'] if cached else []
+
+        headers = dict(self.headers)
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+
+        if not self.rate_limiter.acquire(self.rest_provider):
+            return fallback
+
         try:
-            time.sleep(1) 
-            response = requests.get(self.github_api_url, headers=self.headers, params=params, timeout=10)
+            response = self.session.get(self.github_api_url, headers=headers, params=params, timeout=10)
+            self.rate_limiter.update_from_response(self.rest_provider, response)
             
-            if response.status_code == 200:
+            if response.status_code == 304 and cached:
+                # Revalidated: a 304 does not count against the GitHub rate limit, so refund our token too
+                self.rate_limiter.release(self.rest_provider)
+                self._cache_set(cache_key, cached['results'], cached.get('etag'))
+                return cached['results']
+            elif response.status_code == 200:
                 data = response.json()
-                return self._process_github_results(data.get('items', []), paper_title)
+                results = self._process_github_results(data.get('items', []), paper_title)
+                self._cache_set(cache_key, results, response.headers.get('ETag'))
+                return results
             elif response.status_code == 403:
-                return []
+                return fallback
             else:
-                return []
+                return fallback
         except Exception:
-            return []
+            return fallback
 
     def _process_github_results(self, items, paper_title):
         results = []
@@ -67,3 +243,109 @@ class CodeFinder:
             results.append(result)
             
         return results
+
+class BackgroundCodeSearch:
+    """
+    Runs CodeFinder lookups off the pipeline's critical path.
+    Titles are submitted as papers appear and joined per title when their results are needed.
+    Workers take whatever titles are queued (up to the GraphQL batch size) in one find_codes_parallel call,
+    so batching still applies when a token is configured.
+    With defer=True, submitted titles are only looked up once start() is called for them
+    (e.g. after the paper passes screening), so rejected papers cost no GitHub requests.
+    """
+    def __init__(self, code_finder, max_workers=2, defer=False):
+        self.code_finder = code_finder
+        self.defer = defer
+        self.batch_size = code_finder.graphql_batch_size if code_finder.github_token else 1
+        self._futures = {}
+        self._started = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"code-search-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _future_for(self, title):
+        with self._lock:
+            future = self._futures.get(title)
+            if future is None:
+                future = concurrent.futures.Future()
+                self._futures[title] = future
+            return future
+
+    def submit(self, title):
+        self._future_for(title)
+        if not self.defer:
+            self.start(title)
+
+    def start(self, title):
+        self._future_for(title)
+        with self._lock:
+            if title in self._started or self._closed:
+                return
+            self._started.add(title)
+        self._queue.put(title)
+
+    def peek(self, title):
+        """Return the results if the lookup already finished, else None. Never blocks."""
+        with self._lock:
+            future = self._futures.get(title)
+        if future is not None and future.done() and not future.cancelled():
+            return future.result()
+        return None
+
+    def get(self, title, timeout=60, start=True):
+        """
+        Join the lookup for `title`. A deferred title is started first unless start=False, in which case
+        it returns [] without searching. Returns [] on timeout or after close().
+        """
+        if start:
+            self.start(title)
+        with self._lock:
+            if title not in self._started or (self._closed and not self._futures[title].done()):
+                return []
+        try:
+            return self._future_for(title).result(timeout=timeout)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            return []
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            pending = [f for f in self._futures.values() if not f.done()]
+        for _ in self._workers:
+            self._queue.put(None)
+        # Lookups already running are left to finish; queued ones are dropped
+        for future in pending:
+            future.cancel()
+
+    def _worker(self):
+        while True:
+            title = self._queue.get()
+            if title is None:
+                return
+            batch = [title]
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+
+            futures = [self._future_for(t) for t in batch]
+            batch = [t for t, f in zip(batch, futures) if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.code_finder.find_codes_parallel(batch)
+            except Exception:
+                results = {}
+            for t in batch:
+                self._future_for(t).set_result(results.get(t, []))
@@ -0,0 +1,152 @@
+import re
+import threading
+import time
+from collections import Counter
+
+# The fixed round cap the debate used before stopping policies
+BASELINE_MAX_ROUNDS = 6
+# Stop reasons that end a debate before its policy's max_rounds and count as rounds saved
+EARLY_STOP_REASONS = ('converged', 'repeated_critique', 'confident', 'budget')
+
+_WORD = re.compile(r'\w{4,}')
+
+class LLMTimeBudget:
+    """
+    Seconds of LLM time allowed for debating per run, shared by every debate of the run.
+    Debates are charged for the time their requests hold an LLM slot, so parallel debates waiting
+    on the governor are not counted twice.
+    """
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.spent = 0.0
+        self._lock = threading.Lock()
+
+    def spend(self, seconds):
+        with self._lock:
+            self.spent += seconds
+
+    def exhausted(self):
+        with self._lock:
+            return self.spent >= self.seconds
+
+class StoppingPolicy:
+    """
+    Decides after each debate round whether another round is worth its LLM time.
+    A debate stops at `max_rounds`, or after `min_rounds` once any of these holds:
+    - converged: relevance and total score moved less than `score_tolerance` over the last `stable_rounds` rounds
+    - repeated_critique: at least `critique_overlap` of the words in the latest critique were already raised
+    - confident: relevance is at or below `reject_below` or at or above `accept_above`
+    - budget: the run's LLMTimeBudget is used up
+    Set a threshold to None to disable that rule.
+    """
+    def __init__(self, max_rounds=BASELINE_MAX_ROUNDS, min_rounds=1, score_tolerance=0.5, stable_rounds=2,
+                 critique_overlap=0.8, reject_below=None, accept_above=None):
+        self.max_rounds = max(1, max_rounds)
+        self.min_rounds = min_rounds
+        self.score_tolerance = score_tolerance
+        self.stable_rounds = stable_rounds
+        self.critique_overlap = critique_overlap
+        self.reject_below = reject_below
+        self.accept_above = accept_above
+
+    def start(self, budget=None, initial_analysis=None, clock=time.perf_counter):
+        return DebateTracker(self, budget, initial_analysis, clock)
+
+# Abstracts carry little to argue about, so screening debates stop early once the verdict is clear;
+# full-text debates keep the original round cap and only stop early on convergence or repetition.
+DEFAULT_POLICIES = {
+    'abstract': StoppingPolicy(max_rounds=3, reject_below=2, accept_above=9),
+    'full_text': StoppingPolicy(max_rounds=BASELINE_MAX_ROUNDS),
+}
+
+class DebateTracker:
+    """
+    Per-debate state for a StoppingPolicy; call record_round() after every round, then stop_reason().
+    Each round charges the budget with the increase of `clock()` over the round; the orchestrator passes
+    agents.base.llm_seconds, the LLM time of the debating thread.
+    """
+    def __init__(self, policy, budget=None, initial_analysis=None, clock=time.perf_counter):
+        self.policy = policy
+        self.budget = budget
+        self.rounds = 0
+        # The initial analysis counts as the starting point for score convergence
+        self.scores = [_score_pair(initial_analysis)] if initial_analysis else []
+        self.critiques = []
+        self.clock = clock
+        self._mark = clock()
+
+    def record_round(self, review, analysis):
+        now = self.clock()
+        if self.budget is not None:
+            self.budget.spend(now - self._mark)
+        self._mark = now
+        self.rounds += 1
+        self.scores.append(_score_pair(analysis))
+        self.critiques.append(set(_WORD.findall(str(review.get('critique') or '').lower())))
+
+    def stop_reason(self):
+        policy = self.policy
+        if self.rounds >= policy.max_rounds:
+            return 'max_rounds'
+        if self.rounds < policy.min_rounds:
+            return None
+        if self.budget is not None and self.budget.exhausted():
+            return 'budget'
+        if self._converged():
+            return 'converged'
+        if self._repeated_critique():
+            return 'repeated_critique'
+        relevance = self.scores[-1][0] if self.scores else None
+        if relevance is not None:
+            if policy.reject_below is not None and relevance <= policy.reject_below:
+                return 'confident'
+            if policy.accept_above is not None and relevance >= policy.accept_above:
+                return 'confident'
+        return None
+
+    def _converged(self):
+        window = self.policy.stable_rounds
+        if self.policy.score_tolerance is None or not window or len(self.scores) < window + 1:
+            return False
+        recent = self.scores[-(window + 1):]
+        for values in zip(*recent):
+            if any(v is None for v in values) or max(values) - min(values) > self.policy.score_tolerance:
+                return False
+        return True
+
+    def _repeated_critique(self):
+        if self.policy.critique_overlap is None or len(self.critiques) < 2 or not self.critiques[-1]:
+            return False
+        raised = set().union(*self.critiques[:-1])
+        return len(self.critiques[-1] & raised) / len(self.critiques[-1]) >= self.policy.critique_overlap
+
+def _score_pair(analysis):
+    scores = analysis.get('scores') if isinstance(analysis.get('scores'), dict) else {}
+    return (_number(analysis.get('relevance_score')), _number(scores.get('total')))
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class DebateStats:
+    """Rounds run per stage, and rounds the early-stop rules saved against each debate's own max_rounds."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage, rounds, reason, max_rounds=BASELINE_MAX_ROUNDS):
+        with self._lock:
+            state = self._stages.setdefault(stage, {'debates': 0, 'rounds': 0, 'saved': 0, 'reasons': Counter()})
+            state['debates'] += 1
+            state['rounds'] += rounds
+            state['reasons'][reason] += 1
+            # Approval and rejection ended debates before stopping policies existed, and a debate that ran
+            # to its policy's cap saved nothing either
+            if reason in EARLY_STOP_REASONS:
+                state['saved'] += max(0, max_rounds - rounds)
+
+    def stats(self):
+        with self._lock:
+            return {stage: dict(state, reasons=dict(state['reasons'])) for stage, state in self._stages.items()}
@@ -0,0 +1,209 @@
+import re
+import unicodedata
+
+_LATEX_MATH = re.compile(r'\$[^$]*\$')
+_LATEX_COMMAND = re.compile(r'\\[a-zA-Z]+\*?')
+_NON_WORD = re.compile(r'[^\w\s]|_')
+_WHITESPACE = re.compile(r'\s+')
+_ARXIV_VERSION = re.compile(r'v\d+$')
+
+# Venues that only say where a record came from, not where the paper was published
+_GENERIC_VENUES = {'', 'arxiv', 'google scholar', 'n/a', 'none'}
+
+def normalize_title(title):
+    """
+    Fold a title to a comparison form: LaTeX removed, accents stripped, punctuation dropped, lowercase.
+    """
+    if not title:
+        return ""
+    text = _LATEX_MATH.sub(' ', title)
+    text = _LATEX_COMMAND.sub(' ', text)
+    text = text.replace('{', '').replace('}', '')
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _NON_WORD.sub(' ', text.lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+def normalize_doi(doi):
+    if not doi or not isinstance(doi, str):
+        return None
+    doi = doi.strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:"):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi or None
+
+def normalize_arxiv_id(arxiv_id):
+    """Accepts bare IDs ('2101.00001v2') or abs/pdf URLs and returns the unversioned ID."""
+    if not arxiv_id or not isinstance(arxiv_id, str):
+        return None
+    arxiv_id = arxiv_id.strip()
+    for marker in ("arxiv.org/abs/", "arxiv.org/pdf/"):
+        if marker in arxiv_id:
+            arxiv_id = arxiv_id.split(marker, 1)[1]
+    arxiv_id = arxiv_id.lower()
+    if arxiv_id.endswith(".pdf"):
+        arxiv_id = arxiv_id[:-4]
+    if arxiv_id.startswith("arxiv:"):
+        arxiv_id = arxiv_id[len("arxiv:"):]
+    return _ARXIV_VERSION.sub('', arxiv_id) or None
+
+def paper_identifiers(paper):
+    """Return the identifier keys ('doi:...', 'arxiv:...') known for a search result."""
+    ids = []
+    external = paper.get('externalIds') or {}
+
+    doi = normalize_doi(paper.get('doi') or external.get('DOI'))
+    if doi:
+        ids.append(f"doi:{doi}")
+        # arXiv DOIs (10.48550/arXiv.XXXX) identify the same record as the arXiv ID
+        if doi.startswith("10.48550/arxiv."):
+            ids.append(f"arxiv:{normalize_arxiv_id(doi[len('10.48550/arxiv.'):])}")
+
+    arxiv_id = normalize_arxiv_id(paper.get('arxivId') or external.get('ArXiv'))
+    if arxiv_id:
+        ids.append(f"arxiv:{arxiv_id}")
+
+    return list(dict.fromkeys(ids))
+
+def paper_key(paper):
+    """Stable identity for a search result: its source paperId, else its normalized title."""
+    return paper.get('paperId') or f"title:{normalize_title(paper.get('title'))}"
+
+def token_set_similarity(tokens_a, tokens_b):
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+def _paper_sources(paper):
+    """Every source a record came from: its own 'sources' (if already merged) plus its 'source'."""
+    sources = list(paper.get('sources') or [])
+    if paper.get('source'):
+        sources.append(paper['source'])
+    return list(dict.fromkeys(s for s in sources if s))
+
+def _citation_count(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+class DedupIndex:
+    """
+    Cross-source duplicate detector. A paper matches an existing record if they share a DOI or arXiv ID,
+    have the same normalized title, or (as a last resort) their title token sets overlap above
+    `similarity_threshold`. Matching records are merged so one entry carries the metadata of every source.
+    """
+    def __init__(self, similarity_threshold=0.9, min_fuzzy_tokens=4):
+        self.similarity_threshold = similarity_threshold
+        self.min_fuzzy_tokens = min_fuzzy_tokens
+        self._records = []
+        self._tokens = []
+        self._by_id = {}
+        self._by_title = {}
+        self._by_token = {}
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        return list(self._records)
+
+    def find(self, paper):
+        """Return the index of the matching record, or None."""
+        for key in paper_identifiers(paper):
+            if key in self._by_id:
+                return self._by_id[key]
+
+        title = normalize_title(paper.get('title'))
+        if not title:
+            return None
+        if title in self._by_title:
+            return self._by_title[title]
+
+        tokens = set(title.split())
+        if len(tokens) < self.min_fuzzy_tokens:
+            return None
+        # Only compare against records sharing one of the two longest (most selective) tokens
+        probes = sorted(tokens, key=len, reverse=True)[:2]
+        candidates = set()
+        for token in probes:
+            candidates.update(self._by_token.get(token, ()))
+        best, best_score = None, 0.0
+        for idx in candidates:
+            score = token_set_similarity(tokens, self._tokens[idx])
+            if score > best_score:
+                best, best_score = idx, score
+        if best is not None and best_score >= self.similarity_threshold:
+            return best
+        return None
+
+    def add(self, paper):
+        """
+        Insert or merge a paper. Returns (record, is_new); `record` is the index's own merged dict.
+        """
+        idx = self.find(paper)
+        if idx is None:
+            record = dict(paper)
+            record['sources'] = _paper_sources(paper)
+            idx = len(self._records)
+            self._records.append(record)
+            self._tokens.append(set())
+            is_new = True
+        else:
+            record = self._records[idx]
+            self._merge(record, paper)
+            is_new = False
+
+        self._register(idx, paper)
+        return record, is_new
+
+    def _register(self, idx, paper):
+        for key in paper_identifiers(paper):
+            self._by_id.setdefault(key, idx)
+
+        title = normalize_title(paper.get('title'))
+        if not title:
+            return
+        self._by_title.setdefault(title, idx)
+        tokens = set(title.split())
+        self._tokens[idx] |= tokens
+        for token in tokens:
+            self._by_token.setdefault(token, set()).add(idx)
+
+    def _merge(self, record, paper):
+        for source in _paper_sources(paper):
+            if source not in record['sources']:
+                record['sources'].append(source)
+
+        for field in ('doi', 'arxivId', 'url', 'year', 'paperId'):
+            if not record.get(field) and paper.get(field):
+                record[field] = paper[field]
+
+        external = dict(paper.get('externalIds') or {})
+        external.update(record.get('externalIds') or {})
+        if external:
+            record['externalIds'] = external
+
+        if len(paper.get('abstract') or '') > len(record.get('abstract') or ''):
+            record['abstract'] = paper['abstract']
+
+        if not record.get('openAccessPdf') and paper.get('openAccessPdf'):
+            record['openAccessPdf'] = paper['openAccessPdf']
+
+        ours, theirs = _citation_count(record.get('citations')), _citation_count(paper.get('citations'))
+        if theirs is not None and (ours is None or theirs > ours):
+            record['citations'] = theirs
+
+        if str(record.get('venue') or '').lower() in _GENERIC_VENUES and str(paper.get('venue') or '').lower() not in _GENERIC_VENUES:
+            record['venue'] = paper['venue']
+
+        if len(paper.get('authors') or []) > len(record.get('authors') or []):
+            record['authors'] = paper['authors']
+
+        affiliations = list(record.get('affiliations') or [])
+        for aff in paper.get('affiliations') or []:
+            if aff not in affiliations:
+                affiliations.append(aff)
+        record['affiliations'] = affiliations
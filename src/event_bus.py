@@ -0,0 +1,72 @@
+import queue
+import threading
+import time
+
+_END = object()
+
+# Enough to absorb a burst of debate events; a consumer that falls further behind slows the producers down
+DEFAULT_EVENT_CAPACITY = 256
+
+class EventBus:
+    """
+    Bounded channel from worker threads to a single consumer (the pipeline generator).
+    publish() blocks while the bus is full, so a slow consumer (e.g. a browser tab) applies backpressure to
+    the producers instead of letting buffered events grow without bound. end() marks the producers as done;
+    iterating the bus yields events as they arrive until then. close() detaches the consumer: blocked and
+    future publishers return immediately and their events are dropped.
+    """
+    def __init__(self, capacity=DEFAULT_EVENT_CAPACITY):
+        self.capacity = capacity
+        self._queue = queue.Queue(maxsize=capacity or 0)
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'dropped': 0, 'max_depth': 0, 'blocked_seconds': 0.0}
+
+    def publish(self, event):
+        """Queue an event for the consumer. Returns False if the bus was closed before it could be queued."""
+        return self._put(event)
+
+    def end(self):
+        self._put(_END)
+
+    def close(self):
+        self._closed.set()
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def _put(self, entry):
+        start = None
+        while not self._closed.is_set():
+            try:
+                self._queue.put(entry, timeout=0.5 if start else 0)
+                break
+            except queue.Full:
+                if start is None:
+                    start = time.time()
+        else:
+            with self._lock:
+                self._stats['dropped'] += entry is not _END
+            return False
+
+        with self._lock:
+            if entry is not _END:
+                self._stats['published'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], self._queue.qsize())
+            if start is not None:
+                self._stats['blocked_seconds'] += time.time() - start
+        return True
+
+    def __iter__(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _END:
+                return
+            yield entry
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['depth'] = self._queue.qsize()
+        return snapshot
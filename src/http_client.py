@@ -0,0 +1,89 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool defaults. pool_connections is the number of per-host pools kept alive,
+# pool_maxsize the number of keep-alive sockets per host (should cover the widest fan-out).
+DEFAULT_POOL_CONNECTIONS = 16
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+_session = None
+_session_lock = threading.Lock()
+_config = {
+    'pool_connections': DEFAULT_POOL_CONNECTIONS,
+    'pool_maxsize': DEFAULT_POOL_MAXSIZE,
+    'retries': DEFAULT_RETRIES,
+    'backoff_factor': DEFAULT_BACKOFF,
+}
+
+class _TransientRetry(Retry):
+    # urllib3 retries 413/429/503 whenever they carry Retry-After; only a 503 should be retried here
+    RETRY_AFTER_STATUS_CODES = frozenset([503])
+
+def _build_retry(retries, backoff_factor):
+    # Transport-level retry covers connection errors and transient 5xx responses.
+    # 429 is deliberately left to the callers, which know each provider's quota semantics
+    # and report it to the shared RateLimiter.
+    return _TransientRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                   retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF):
+    """
+    Build a requests.Session with keep-alive connection pools and retry on both http and https.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=_build_retry(retries, backoff_factor),
+        pool_block=False
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session():
+    """
+    Return the process-wide shared session, creating it on first use.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session(**_config)
+    return _session
+
+def configure(**kwargs):
+    """
+    Change pool sizes / retry policy for the shared session.
+    Accepts pool_connections, pool_maxsize, retries, backoff_factor. Existing connections are closed.
+    """
+    global _session
+    unknown = set(kwargs) - set(_config)
+    if unknown:
+        raise ValueError(f"Unknown HTTP client options: {sorted(unknown)}")
+    with _session_lock:
+        _config.update(kwargs)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def close():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,113 @@
+import json
+
+class IncrementalJSONParser:
+    """
+    Consumes streamed LLM output chunk by chunk and tracks the top-level JSON object (or array).
+    Each top-level field of an object is parsed and passed to `on_field(key, value)` as soon as its value
+    closes, and `done` turns True when the matching closing brace or bracket arrives, so the caller can
+    stop generation. Text before the value (and inside <think> blocks) is ignored; `text` holds the value itself.
+    """
+    def __init__(self, on_field=None):
+        self.on_field = on_field
+        self.fields = {}
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._start = None
+        self._array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    @property
+    def text(self):
+        if self._start is None:
+            return self._buffer
+        return self._buffer[self._start:self._pos if self.done else len(self._buffer)]
+
+    def feed(self, chunk):
+        """Add a chunk; returns True once the top-level object is complete."""
+        if self.done or not chunk:
+            return self.done
+        self._buffer += chunk
+        if self._start is None and not self._find_start():
+            return False
+
+        buf = self._buffer
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key_start is not None and self._value_start is None:
+                        self._key = self._decode(buf[self._key_start:i + 1])
+                        self._key_start = None
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and not self._array and self._value_start is None and self._key is None:
+                    self._key_start = i
+            elif ch == ':' and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_field(buf[self._value_start:i] if self._value_start is not None else None)
+                    self._pos = i + 1
+                    self.done = True
+                    return True
+            elif ch == ',' and self._depth == 1:
+                self._close_field(buf[self._value_start:i] if self._value_start is not None else None)
+            i += 1
+        self._pos = i
+        return False
+
+    def _find_start(self):
+        buf = self._buffer
+        offset = 0
+        think_end = buf.rfind('</think>')
+        if '<think>' in buf:
+            if think_end == -1:
+                return False
+            offset = think_end + len('</think>')
+        starts = [i for i in (buf.find('{', offset), buf.find('[', offset)) if i != -1]
+        if not starts:
+            return False
+        idx = min(starts)
+        self._start = idx
+        self._array = buf[idx] == '['
+        self._depth = 1
+        self._pos = idx + 1
+        return True
+
+    def _close_field(self, raw):
+        key = self._key
+        self._key = None
+        self._value_start = None
+        if key is None or raw is None:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields[key] = value
+        if self.on_field:
+            try:
+                self.on_field(key, value)
+            except Exception as e:
+                print(f"[IncrementalJSONParser] on_field callback failed: {e}")
+
+    def _decode(self, quoted):
+        try:
+            return json.loads(quoted)
+        except ValueError:
+            return quoted.strip('"')
@@ -0,0 +1,83 @@
+from collections import deque
+
+# Below this many terms, a plain `term in text` loop (C-level substring search) is faster
+# than walking the automaton in Python.
+NAIVE_TERM_LIMIT = 150
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher (Aho-Corasick compiled to a DFA).
+    Finds whether any of the terms occurs in a text in a single pass, independent of the number of terms.
+    Matching is case-insensitive; terms and text are lowercased.
+    """
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(t.lower().strip() for t in terms if t and t.strip()))
+        self._delta = None
+        self._output = None
+        if len(self.terms) > NAIVE_TERM_LIMIT:
+            self._build()
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _build(self):
+        goto = [{}]
+        output = [None]
+        for term in self.terms:
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    output.append(None)
+                    goto[state][ch] = nxt
+                state = nxt
+            output[state] = term
+
+        # Breadth-first construction of failure links, folded directly into a full transition table
+        # so matching never has to follow failure chains.
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            f = fail[state]
+            transitions = dict(delta[f])
+            transitions.update(goto[state])
+            delta[state] = transitions
+            if output[state] is None:
+                output[state] = output[f]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[f].get(ch, 0)
+                queue.append(nxt)
+
+        self._delta = delta
+        self._output = output
+
+    def search(self, text):
+        """Return the first term found in `text`, or None."""
+        if not self.terms or not text:
+            return None
+        text = text.lower()
+
+        if self._delta is None:
+            for term in self.terms:
+                if term in text:
+                    return term
+            return None
+
+        delta, output = self._delta, self._output
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+    def matches(self, text):
+        return self.search(text) is not None
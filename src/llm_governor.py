@@ -0,0 +1,212 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from utils import get_output_dir
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Lower value = admitted first. The synthesis is the last step of a run and blocks the report,
+# full-text debates sit on the critical path of accepted papers, screening feeds everything else.
+PRIORITIES = {
+    'synthesis': 0,
+    'full_text': 1,
+    'default': 2,
+    'screening': 3,
+}
+
+def _default_concurrency():
+    # Ollama serves OLLAMA_NUM_PARALLEL requests per model; anything beyond that only queues inside the server
+    for var in ('FINDURCITE_LLM_CONCURRENCY', 'OLLAMA_NUM_PARALLEL'):
+        try:
+            value = int(os.environ.get(var, ''))
+            if value > 0:
+                return value
+        except ValueError:
+            pass
+    return 1
+
+_local = threading.local()
+
+@contextmanager
+def llm_priority(name):
+    """Tag every LLM call made by the current thread inside the block with a priority class."""
+    previous = getattr(_local, 'priority', None)
+    _local.priority = name
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+def current_priority():
+    return getattr(_local, 'priority', None) or 'default'
+
+class _ModelState:
+    def __init__(self):
+        self.in_flight = 0
+        self.waiters = []
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queued = 0
+
+class LLMGovernor:
+    """
+    Admission controller for LLM requests. Caps the number of in-flight requests per model and
+    queues the rest, admitting waiters by priority class and then arrival order.
+    With `lock_dir` set, each admitted request also holds one of `max_concurrent` lock files per model,
+    so separate processes (e.g. a CLI run next to the web app) share the same cap.
+    """
+    def __init__(self, max_concurrent=None, per_model=None, lock_dir=None):
+        self.max_concurrent = max_concurrent or _default_concurrency()
+        self.per_model = dict(per_model or {})
+        self.lock_dir = lock_dir
+        if lock_dir and not os.path.exists(lock_dir):
+            os.makedirs(lock_dir)
+        self._cond = threading.Condition()
+        self._models = {}
+        self._seq = itertools.count()
+
+    def limit_for(self, model):
+        return self.per_model.get(model, self.max_concurrent)
+
+    @contextmanager
+    def slot(self, model, priority=None):
+        """Hold one request slot for `model` for the duration of the block."""
+        priority = priority or current_priority()
+        rank = PRIORITIES.get(priority, PRIORITIES['default'])
+        start = time.time()
+        self._acquire(model, rank)
+        lock_file = None
+        try:
+            if self.lock_dir:
+                lock_file = self._acquire_file_slot(model)
+            self._record_wait(model, time.time() - start)
+            yield
+        finally:
+            if lock_file is not None:
+                self._release_file_slot(lock_file)
+            self._release(model)
+
+    def _acquire(self, model, rank):
+        with self._cond:
+            state = self._models.setdefault(model, _ModelState())
+            entry = (rank, next(self._seq))
+            heapq.heappush(state.waiters, entry)
+            state.max_queued = max(state.max_queued, len(state.waiters))
+            try:
+                while state.in_flight >= self.limit_for(model) or state.waiters[0] != entry:
+                    self._cond.wait()
+            except BaseException:
+                # Interrupted while queued (e.g. KeyboardInterrupt): withdraw the ticket, or every later
+                # request for this model would wait behind it forever
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(state.waiters)
+            state.in_flight += 1
+            # The next waiter may also fit if the limit is above one
+            self._cond.notify_all()
+
+    def _release(self, model):
+        with self._cond:
+            self._models[model].in_flight -= 1
+            self._cond.notify_all()
+
+    def _record_wait(self, model, waited):
+        with self._cond:
+            state = self._models[model]
+            state.admitted += 1
+            state.total_wait += waited
+            state.max_wait = max(state.max_wait, waited)
+
+    def _acquire_file_slot(self, model):
+        base = re.sub(r'[^\w.-]', '_', model)
+        paths = [os.path.join(self.lock_dir, f"{base}.{i}.lock") for i in range(self.limit_for(model))]
+        while True:
+            for path in paths:
+                fh = open(path, 'a+b')
+                if _try_lock(fh):
+                    return fh
+                fh.close()
+            time.sleep(0.05)
+
+    def _release_file_slot(self, fh):
+        try:
+            _unlock(fh)
+        finally:
+            fh.close()
+
+    def stats(self, since=None):
+        """
+        Per-model queue depth, in-flight count and wait times (seconds).
+        With `since` (an earlier stats() result), 'admitted', 'total_wait' and 'avg_wait' only cover the
+        requests admitted after it; the max_* peaks are always since the governor was created.
+        """
+        since = since or {}
+        with self._cond:
+            stats = {}
+            for model, state in self._models.items():
+                before = since.get(model, {})
+                admitted = state.admitted - before.get('admitted', 0)
+                total_wait = state.total_wait - before.get('total_wait', 0.0)
+                stats[model] = {
+                    'limit': self.limit_for(model),
+                    'in_flight': state.in_flight,
+                    'queued': len(state.waiters),
+                    'max_queued': state.max_queued,
+                    'admitted': admitted,
+                    'total_wait': total_wait,
+                    'avg_wait': total_wait / admitted if admitted else 0.0,
+                    'max_wait': state.max_wait,
+                }
+            return stats
+
+def _try_lock(fh):
+    try:
+        if fcntl:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fh):
+    if fcntl:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+_governor = None
+_governor_lock = threading.Lock()
+
+def configure(max_concurrent=None, per_model=None, cross_process=False, lock_dir=None):
+    """Replace the process-wide governor. cross_process=True shares the cap through lock files in research_results/.cache."""
+    global _governor
+    if cross_process and not lock_dir:
+        lock_dir = os.path.join(get_output_dir(), ".cache", "llm_slots")
+    with _governor_lock:
+        _governor = LLMGovernor(max_concurrent=max_concurrent, per_model=per_model, lock_dir=lock_dir)
+    return _governor
+
+def get_governor():
+    """Return the process-wide governor shared by every agent (and every web session) in this process."""
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                lock_dir = os.environ.get('FINDURCITE_LLM_LOCK_DIR') or None
+                _governor = LLMGovernor(lock_dir=lock_dir)
+    return _governor
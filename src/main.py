@@ -1,17 +1,57 @@
 import os
 import argparse
 from searcher import Searcher
-from code_finder import CodeFinder
+from code_finder import CodeFinder, BackgroundCodeSearch
 import time
 from pdf_processor import PDFProcessor
-import concurrent.futures
+import threading
 from workflow import WorkflowOrchestrator
+from stage_graph import Stage, StageGraph
+from event_bus import EventBus, DEFAULT_EVENT_CAPACITY
+import llm_governor
+from llm_governor import get_governor, llm_priority
 import logging
 from utils import get_output_dir
+from cache import LLMResponseCache
+from agents.base import chat_stats
+from model_residency import ModelResidency
+from debate_policy import LLMTimeBudget
+from screening import BatchScreener, DEFAULT_BATCH_SIZE, DEFAULT_THRESHOLD
+from prerank import EmbeddingPreRanker, DEFAULT_EMBEDDING_MODEL, DEFAULT_RANK_WINDOW
+
+# Worker threads per deep-read stage. Screening and full-text debates share the local LLM, whose
+# concurrency is capped by the LLM governor, so those stages stay narrow; downloads are network-bound.
+DEFAULT_STAGE_WORKERS = {'screen': 1, 'download': 5, 'extract': 2, 'full_debate': 2}
+# Queue bound in front of each downstream stage (the screening queue is fed by search and is unbounded)
+DEFAULT_STAGE_CAPACITY = {'download': 10, 'extract': 4, 'full_debate': 4}
 
 class ResearchPipeline:
-    def __init__(self, model="qwen2.5:7b", output_dir=None, pdf_dir=None):
+    def __init__(self, model="qwen2.5:7b", output_dir=None, pdf_dir=None, skip_code_for_rejected=False,
+                 stage_workers=None, stage_capacity=None, event_capacity=DEFAULT_EVENT_CAPACITY, llm_cache=False,
+                 stream_llm=False, advisor_model=None, keep_alive=None, warm_up=True, debate_sessions=False,
+                 delta_prompts=False, debate_policies=None, llm_time_budget=None, batch_screening=False,
+                 screening_batch_size=DEFAULT_BATCH_SIZE, screening_threshold=DEFAULT_THRESHOLD, prerank_top_k=None,
+                 prerank_min_similarity=None, embedding_model=DEFAULT_EMBEDDING_MODEL, prerank_top_k_per_window=None,
+                 prerank_window=DEFAULT_RANK_WINDOW):
         self.model = model
+        self.advisor_model = advisor_model or model
+        # When set, GitHub lookups only run for papers that pass abstract screening
+        self.skip_code_for_rejected = skip_code_for_rejected
+        self.stage_workers = dict(DEFAULT_STAGE_WORKERS, **(stage_workers or {}))
+        self.stage_capacity = dict(DEFAULT_STAGE_CAPACITY, **(stage_capacity or {}))
+        # Seconds of LLM time for debates per run; once spent, every remaining debate stops after its first round
+        self.llm_time_budget = llm_time_budget
+        # Score abstracts in batches first and only debate those at or above the threshold
+        self.batch_screening = batch_screening
+        self.screening_batch_size = screening_batch_size
+        self.screening_threshold = screening_threshold
+        # Embedding pre-ranking: only the top-K / above-threshold candidates reach LLM screening
+        self.preranker = None
+        if prerank_top_k is not None or prerank_min_similarity is not None or prerank_top_k_per_window is not None:
+            self.preranker = EmbeddingPreRanker(model=embedding_model, top_k=prerank_top_k, min_similarity=prerank_min_similarity,
+                                                top_k_per_window=prerank_top_k_per_window, window=prerank_window)
+        # Events buffered for the consumer before producers block
+        self.event_capacity = event_capacity
         
         if not output_dir:
             timestamp = time.strftime("%Y%m%d_%H%M%S")
@@ -29,11 +69,22 @@ class ResearchPipeline:
         if not os.path.exists(self.pdf_dir):
             os.makedirs(self.pdf_dir)
             
-        self.orchestrator = WorkflowOrchestrator(model=self.model)
+        # Replays identical LLM requests from research_results/.cache/llm_responses.db
+        self.llm_cache = LLMResponseCache() if llm_cache else None
+        # Keeps the Student and Advisor models loaded for the whole run (see model_residency.py)
+        self.residency = ModelResidency([self.model, self.advisor_model], keep_alive=keep_alive)
+        # Streamed completions surface preliminary scores early and stop once the JSON object closes
+        self.orchestrator = WorkflowOrchestrator(model=self.model, response_cache=self.llm_cache, stream=stream_llm,
+                                                 advisor_model=self.advisor_model, keep_alive=self.residency.keep_alive,
+                                                 debate_sessions=debate_sessions, delta_prompts=delta_prompts,
+                                                 policies=debate_policies)
         self.searcher = Searcher()
         self.code_finder = CodeFinder()
         self.pdf_processor = PDFProcessor()
         self.pdf_processor.set_download_dir(self.pdf_dir)
+        # Load the weights now so the cold start overlaps with setup, input analysis and search
+        if warm_up:
+            self.residency.warm_up()
 
     def _analyze_single_paper(self, paper, key_viewpoint):
         events = []
@@ -45,7 +96,12 @@ class ResearchPipeline:
 
     def run(self, user_text):
         yield {"type": "log", "content": f"Initializing pipeline with model: {self.model}"}
+        if self.advisor_model != self.model:
+            yield {"type": "log", "content": f"Advisor model: {self.advisor_model} (keep-alive {self.residency.keep_alive})"}
         yield {"type": "log", "content": f"Output Directory: {self.output_dir}"}
+        self.orchestrator.budget = LLMTimeBudget(self.llm_time_budget) if self.llm_time_budget else None
+        # The LLM counters are process-wide (shared with other runs and web sessions); report this run's share
+        governor_start, chat_start = get_governor().stats(), chat_stats()
         
         yield {"type": "status", "stage": "analyze_input", "content": "Analyzing user input..."}
         input_analysis = self.orchestrator.student.analyze_user_input(user_text)
@@ -63,182 +119,258 @@ class ResearchPipeline:
         yield {"type": "log", "content": f"  - English Keywords (Filter): {english_keywords}"}
         
         yield {"type": "status", "stage": "search", "content": "Searching papers..."}
-        papers = self.searcher.search_multiple_queries(search_queries, limit_per_source=5, keywords_filter=english_keywords)
-        if not papers:
-            yield {"type": "error", "content": "No papers found."}
-            return
 
-        yield {"type": "log", "content": f"Found {len(papers)} papers."}
-        
-        for paper in papers:
-             yield {"type": "paper_found", "paper": paper}
+        final_results = []
 
-        yield {"type": "status", "stage": "find_code", "content": "Finding code repositories..."}
-        paper_titles = [p['title'] for p in papers]
-        code_results = self.code_finder.find_codes_parallel(paper_titles)
-        yield {"type": "log", "content": "Code search completed."}
+        screener = None
+        if self.batch_screening:
+            screener = BatchScreener(self.orchestrator.student, key_viewpoint, batch_size=self.screening_batch_size,
+                                     threshold=self.screening_threshold)
 
-        yield {"type": "status", "stage": "analysis", "content": "Starting Deep Read Pipeline..."}
-        final_results = []
-        candidates_for_deep_read = []
-        
-        yield {"type": "log", "content": "Phase 1: Screening Abstracts (Sequential Processing for Stability)..."}
-        
-        # Use a Queue to stream events from the worker thread to the main thread
-        import queue
-        event_queue = queue.Queue()
-        
-        def analyze_wrapper(paper):
+        def batch_screen_stage(paper):
             try:
-                def callback(event):
-                    event_queue.put({"type": "debate_event", "data": event, "paper_title": paper['title']})
-                
-                analysis = self.orchestrator.analyze_paper_with_debate(key_viewpoint, paper, callback=callback, searcher=self.searcher)
-                return paper, analysis
+                with llm_priority('screening'):
+                    score = screener.score(paper)
+            except Exception as e:
+                graph.emit({"type": "log", "content": f"Error batch screening {paper['title'][:20]}: {str(e)}"})
+                score = None
+            if screener.passes(score):
+                return 'screen', paper
+            return finish_screening(paper, screener.screened_out_analysis(score))
+
+        def screen_stage(paper):
+            def callback(event):
+                graph.emit({"type": "debate_event", "data": event, "paper_title": paper['title']})
+            try:
+                with llm_priority('screening'):
+                    analysis = self.orchestrator.analyze_paper_with_debate(key_viewpoint, paper, callback=callback, searcher=self.searcher)
             except Exception as e:
                 # Log error but don't crash
-                event_queue.put({"type": "log", "content": f"Error analyzing {paper['title'][:20]}: {str(e)}"})
-                return paper, {}
+                graph.emit({"type": "log", "content": f"Error analyzing {paper['title'][:20]}: {str(e)}"})
+                analysis = {}
+            return finish_screening(paper, analysis)
 
-        # We run sequentially (max_workers=1) because local LLMs cannot handle concurrency well.
-        # We also need to consume the queue while the task is running.
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future_to_paper = {executor.submit(analyze_wrapper, p): p for p in papers}
-            
-            # Monitoring loop: while futures are running, consume the queue
-            # This is a bit tricky with blocking 'as_completed'.
-            # Better approach: Check queue periodically while waiting for results?
-            # Or just use the callback to yield? No, can't yield from thread.
-            # We can use a while loop that checks futures status.
-            
-            pending_futures = list(future_to_paper.keys())
-            while pending_futures:
-                # check for events
-                while not event_queue.empty():
-                    yield event_queue.get()
-                
-                # Check for completed futures
-                done_futures = [f for f in pending_futures if f.done()]
-                for f in done_futures:
-                    pending_futures.remove(f)
-                    try:
-                        paper, analysis = f.result()
-                        
-                        # Yield completion logs
-                        msg = f"[{len(papers) - len(pending_futures)}/{len(papers)}] Screened: {paper['title'][:30]}..."
-                        yield {"type": "log", "content": msg}
-                        
-                        relevance = analysis.get('relevance_score', 0)
-                        item = {
-                            'paper': paper,
-                            'analysis': analysis,
-                            'codes': code_results.get(paper['title'], [])
-                        }
-                        
-                        yield {"type": "paper_analyzed", "item": item}
-                        
-                        if relevance >= 4:
-                            candidates_for_deep_read.append(item)
-                        else:
-                            final_results.append(item)
-                            
-                    except Exception as e:
-                        yield {"type": "log", "content": f"Critical Error in future: {e}"}
-                
-                if pending_futures:
-                    time.sleep(0.1) # Prevent busy loop
+        def finish_screening(paper, analysis):
+            with counter_lock:
+                screened[0] += 1
+                done = screened[0]
+            graph.emit({"type": "log", "content": f"[{done}/{len(papers)}] Screened: {paper['title'][:30]}..."})
 
-            # Flush remaining events
-            while not event_queue.empty():
-                yield event_queue.get()
+            relevance = analysis.get('relevance_score', 0)
+            if relevance >= 4:
+                code_search.start(paper['title'])
+            item = {
+                'paper': paper,
+                'analysis': analysis,
+                'codes': code_search.peek(paper['title']) or []
+            }
+            graph.emit({"type": "paper_analyzed", "item": item})
+            if relevance >= 4:
+                return 'download', item
+            return None, item
 
-        yield {"type": "log", "content": f"Phase 2: Deep Reading {len(candidates_for_deep_read)} candidates..."}
-        
-        processed_candidates = []
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_item = {executor.submit(self._process_pdf_candidate, item): item for item in candidates_for_deep_read}
-            
-            for future in concurrent.futures.as_completed(future_to_item):
-                item, text, pdf_path = future.result()
-                paper = item['paper']
-                
-                if text and len(text) > 1000:
-                    item['full_text'] = text
-                    yield {"type": "log", "content": f"  -> Extracted {len(text)} chars for: {item['paper']['title'][:30]}"}
-                else:
-                    yield {"type": "log", "content": f"  -> Failed to extract text for: {item['paper']['title'][:30]}"}
-                
-                if pdf_path and os.path.exists(pdf_path):
-                     yield {"type": "pdf_ready", "paper": paper, "pdf_path": pdf_path}
-                
-                processed_candidates.append(item)
+        def stage_failed(item, error):
+            # Keep the paper in the results with whatever analysis it already has, as the sequential loop did
+            if 'paper' not in item:
+                item = {'paper': item, 'analysis': {}, 'codes': code_search.peek(item['title']) or []}
+            item.pop('pdf_path', None)
+            item['error'] = str(error)
+            return item
 
-        yield {"type": "log", "content": "Phase 3: Analyzing Full Texts (Multi-Agent Debate)..."}
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            def analyze_full(item):
-                events = []
-                def callback(event):
-                    events.append(event)
-                full_analysis = self.orchestrator.analyze_paper_with_debate(key_viewpoint, item['paper'], item.get('full_text'), callback=callback)
-                return item, full_analysis, events
-
-            future_to_item = {executor.submit(analyze_full, item): item for item in processed_candidates if 'full_text' in item}
-            
-            for item in processed_candidates:
-                if 'full_text' not in item:
-                    final_results.append(item)
+        def download_stage(item):
+            pdf_path = self._download_pdf_candidate(item)
+            if not pdf_path:
+                graph.emit({"type": "log", "content": f"  -> Failed to extract text for: {item['paper']['title'][:30]}"})
+                return None, item
+            item['pdf_path'] = pdf_path
+            graph.emit({"type": "pdf_ready", "paper": item['paper'], "pdf_path": pdf_path})
+            return 'extract', item
 
-            for future in concurrent.futures.as_completed(future_to_item):
-                item, full_analysis, events = future.result()
-                yield {"type": "log", "content": f"  -> Analyzed Full Text: {item['paper']['title'][:30]}..."}
-                
-                for event in events:
-                    yield {"type": "debate_event", "data": event, "paper_title": item['paper']['title']}
-                
-                item['analysis'] = full_analysis
-                yield {"type": "paper_analyzed", "item": item}
-                final_results.append(item)
+        def extract_stage(item):
+            text = self._extract_pdf_candidate(item.pop('pdf_path'))
+            if text and len(text) > 1000:
+                item['full_text'] = text
+                graph.emit({"type": "log", "content": f"  -> Extracted {len(text)} chars for: {item['paper']['title'][:30]}"})
+                return 'full_debate', item
+            graph.emit({"type": "log", "content": f"  -> Failed to extract text for: {item['paper']['title'][:30]}"})
+            return None, item
+
+        def full_debate_stage(item):
+            def callback(event):
+                graph.emit({"type": "debate_event", "data": event, "paper_title": item['paper']['title']})
+            try:
+                with llm_priority('full_text'):
+                    full_analysis = self.orchestrator.analyze_paper_with_debate(key_viewpoint, item['paper'], item.get('full_text'), callback=callback)
+            except Exception as e:
+                graph.emit({"type": "log", "content": f"Error analyzing full text of {item['paper']['title'][:20]}: {str(e)}"})
+                return None, item
+            graph.emit({"type": "log", "content": f"  -> Analyzed Full Text: {item['paper']['title'][:30]}..."})
+            item['analysis'] = full_analysis
+            graph.emit({"type": "paper_analyzed", "item": item})
+            return None, item
+
+        # Each paper flows through screen -> download -> extract -> full debate on its own, so PDFs are
+        # fetched and full-text debates start while other abstracts are still being screened.
+        # Bounded queues between stages keep a fast producer from piling up work ahead of the LLM.
+        workers, capacity = self.stage_workers, self.stage_capacity
+        stages = [
+            Stage('screen', screen_stage, workers=workers['screen'], on_error=stage_failed),
+            Stage('download', download_stage, workers=workers['download'], capacity=capacity['download'], on_error=stage_failed),
+            Stage('extract', extract_stage, workers=workers['extract'], capacity=capacity['extract'], on_error=stage_failed),
+            Stage('full_debate', full_debate_stage, workers=workers['full_debate'], capacity=capacity['full_debate'], on_error=stage_failed),
+        ]
+        if screener:
+            # Batch scoring runs ahead of the debates as its own entry stage. Its workers mostly wait for
+            # their batch to fill, so there is one per batch slot; the debate stage keeps its own worker count.
+            stages.insert(0, Stage('batch_screen', batch_screen_stage, workers=self.screening_batch_size, on_error=stage_failed))
+        graph = StageGraph(stages, output_capacity=self.event_capacity)
+        # Code discovery runs in the background; results are joined per paper when they are needed.
+        code_search = BackgroundCodeSearch(self.code_finder, defer=self.skip_code_for_rejected)
+        papers = []
+        screened = [0]
+        counter_lock = threading.Lock()
+
+        def on_paper_found(paper):
+            papers.append(paper)
+            graph.emit({"type": "paper_found", "paper": paper})
+            code_search.submit(paper['title'])
+
+        graph.start()
+        try:
+            # Search runs on a feeder thread; screening starts as soon as the first candidates stream in,
+            # while slower sources are still searching. Every event reaches the consumer as soon as it is
+            # produced through the graph's blocking output queue.
+            candidates = self.searcher.iter_search_multiple_queries(search_queries, limit_per_source=5, keywords_filter=english_keywords)
+            if self.preranker:
+                # A global top_k ranks the complete candidate list, so screening only starts once the search has
+                # finished; top_k_per_window keeps streaming and screens the best of each window as it fills.
+                candidates = self.preranker.filter(key_viewpoint, candidates)
+            graph.feed(candidates, on_item=on_paper_found)
+
+            for kind, payload in graph.stream():
+                if kind == 'event':
+                    yield payload
+                elif kind == 'result':
+                    final_results.append(payload)
+                elif kind == 'fed':
+                    if not papers:
+                        code_search.close()
+                        yield {"type": "error", "content": "No papers found."}
+                        return
+
+                    yield {"type": "log", "content": f"Found {len(papers)} papers."}
+
+                    yield {"type": "status", "stage": "find_code", "content": "Finding code repositories..."}
+                    if self.skip_code_for_rejected:
+                        yield {"type": "log", "content": "Code search will run in the background for papers that pass screening."}
+                    else:
+                        yield {"type": "log", "content": "Code search running in the background."}
+
+                    yield {"type": "status", "stage": "analysis", "content": "Starting Deep Read Pipeline..."}
+                    yield {"type": "log", "content": "Deep read pipeline: " + ", ".join(f"{name} x{n}" for name, n in workers.items())}
+        except GeneratorExit:
+            code_search.close()
+            raise
+        finally:
+            graph.shutdown()
+
+        # Join code discovery; deferred lookups for rejected papers are never started
+        for item in final_results:
+            item['codes'] = code_search.get(item['paper']['title'], start=not self.skip_code_for_rejected)
+        code_search.close()
 
         final_results.sort(key=lambda x: x['analysis'].get('relevance_score', 0), reverse=True)
 
         yield {"type": "status", "stage": "synthesis", "content": "Global Synthesis & Gap Analysis..."}
         
-        events = []
-        def synthesis_callback(event):
-            events.append(event)
-            
-        synthesis = self.orchestrator.perform_global_synthesis(key_viewpoint, final_results, callback=synthesis_callback)
-        for event in events:
-             yield {"type": "debate_event", "data": event, "paper_title": "Global Synthesis"}
+        # Synthesis runs on a worker thread so its debate events stream out as they are produced
+        bus = EventBus(self.event_capacity)
+        outcome = {}
+        def synthesize():
+            def callback(event):
+                bus.publish({"type": "debate_event", "data": event, "paper_title": "Global Synthesis"})
+            try:
+                with llm_priority('synthesis'):
+                    outcome['synthesis'] = self.orchestrator.perform_global_synthesis(key_viewpoint, final_results, callback=callback)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                bus.end()
+
+        threading.Thread(target=synthesize, name="global-synthesis", daemon=True).start()
+        try:
+            for event in bus:
+                yield event
+        finally:
+            bus.close()
+        if 'error' in outcome:
+            raise outcome['error']
+        synthesis = outcome['synthesis']
         
         report_context = f"**Draft Analysis:** {core_contribution}\n\n**Viewpoint:** {key_viewpoint}"
         generate_report(report_context, final_results, self.output_dir, "research_result.md", synthesis)
+
+        llm_stats = get_governor().stats(since=governor_start).get(self.model)
+        if llm_stats:
+            yield {"type": "log", "content": f"LLM queue: {llm_stats['admitted']} requests, avg wait {llm_stats['avg_wait']:.1f}s"}
+        if self.llm_cache:
+            cache_stats = self.llm_cache.stats()
+            yield {"type": "log", "content": f"LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"}
+        if self.residency.ready():
+            for model, seconds in self.residency.load_times.items():
+                yield {"type": "log", "content": f"LLM warm-up: {model} loaded in {seconds:.1f}s"}
+            for model, error in self.residency.errors.items():
+                yield {"type": "log", "content": f"LLM warm-up failed for {model}: {error}"}
+        evicted = self.residency.missing() if len(self.residency.models) > 1 else []
+        if evicted:
+            yield {"type": "log", "content": f"Warning: {', '.join(evicted)} no longer loaded in Ollama; Student and Advisor models are "
+                                             f"evicting each other. Raise OLLAMA_MAX_LOADED_MODELS or use one model for both."}
+        if self.preranker:
+            stats = self.preranker.stats()
+            if stats['failed']:
+                yield {"type": "log", "content": f"Pre-ranking: embedding model {self.preranker.model} unavailable, all candidates were screened"}
+            yield {"type": "log", "content": f"Pre-ranking: kept {stats['kept']} of {stats['candidates']} candidates for LLM screening "
+                                             f"({stats['embedded']} texts embedded, {stats['cached']} from cache)"}
+        if screener:
+            stats = screener.stats()
+            yield {"type": "log", "content": f"Batch screening: {stats['papers']} papers in {stats['batches']} LLM calls, "
+                                             f"{stats['screened_out']} below {self.screening_threshold} skipped the debate, "
+                                             f"{stats['unscored']} unscored"}
+        for stage, stats in self.orchestrator.debate_stats.stats().items():
+            reasons = ", ".join(f"{reason} {count}" for reason, count in sorted(stats['reasons'].items()))
+            yield {"type": "log", "content": f"Debates ({stage}): {stats['debates']} papers, {stats['rounds']} rounds, "
+                                             f"{stats['saved']} rounds saved ({reasons})"}
+        output_stats = chat_stats(since=chat_start)
+        yield {"type": "log", "content": f"LLM output: {output_stats['requests']} requests, {output_stats['retries']} retries "
+                                         f"({output_stats['retry_rate']:.1%}), {output_stats['parse_failures']} unparseable, "
+                                         f"{output_stats['schema_failures']} failed schema validation"}
         
         yield {"type": "success", "content": f"Report generated in {self.output_dir}"}
         yield {"type": "result", "data": final_results, "synthesis": synthesis, "output_dir": self.output_dir}
                 
-    def _process_pdf_candidate(self, item):
+    def _download_pdf_candidate(self, item):
         paper = item['paper']
         pdf_url = None
         if paper.get('openAccessPdf'):
             pdf_url = paper.get('openAccessPdf', {}).get('url')
         elif paper.get('url') and "arxiv.org/abs" in paper.get('url'):
             pdf_url = paper.get('url').replace('abs', 'pdf')
-            
-        full_text = None
-        pdf_path = None
-        
-        if pdf_url:
-            try:
-                pdf_path = self.pdf_processor.download_pdf(pdf_url)
-                if pdf_path:
-                    full_text = self.pdf_processor.extract_text(pdf_path, max_pages=15)
-            except Exception as e:
-                pass 
-        return item, full_text, pdf_path
+
+        if not pdf_url:
+            return None
+        try:
+            pdf_path = self.pdf_processor.download_pdf(pdf_url)
+        except Exception:
+            return None
+        if pdf_path and os.path.exists(pdf_path):
+            return pdf_path
+        return None
+
+    def _extract_pdf_candidate(self, pdf_path):
+        try:
+            return self.pdf_processor.extract_text(pdf_path, max_pages=15)
+        except Exception:
+            return None
 
 def generate_report(user_input, results, output_dir, filename="research_result.md", synthesis=None):
     if not os.path.exists(output_dir):
@@ -345,14 +477,39 @@ def generate_report(user_input, results, output_dir, filename="research_result.m
             ]
             f.write("| " + " | ".join(row) + " |\n")
 
+def _keep_alive(value):
+    # Ollama takes a duration string ("10m") or a number of seconds (negative = keep loaded indefinitely)
+    return int(value) if value.lstrip('-').isdigit() else value
+
 def main():
     parser = argparse.ArgumentParser(description="FindUrCite - AI Research Assistant")
     parser.add_argument("input", help="Your research idea, draft text, or path to a text file (.txt)")
     parser.add_argument("--model", default="qwen2.5:7b", help="Ollama model to use")
     parser.add_argument("--output", default=None, help="Output directory")
     parser.add_argument("--pdf_dir", default=None, help="PDF download directory")
+    parser.add_argument("--skip_code_for_rejected", action="store_true", help="Only search GitHub for papers that pass abstract screening")
+    parser.add_argument("--llm_concurrency", type=int, default=None, help="Max in-flight LLM requests per model (default: OLLAMA_NUM_PARALLEL or 1)")
+    parser.add_argument("--llm_cache", action="store_true", help="Replay identical LLM requests from the on-disk response cache")
+    parser.add_argument("--stream_llm", action="store_true", help="Stream LLM output, showing scores early and stopping once the JSON is complete")
+    parser.add_argument("--advisor_model", default=None, help="Ollama model for the Advisor (default: same as --model)")
+    parser.add_argument("--keep_alive", type=_keep_alive, default=None, help="How long Ollama keeps the models loaded, e.g. 10m, 1h or -1 (default: 10m, 30m with two models)")
+    parser.add_argument("--debate_sessions", action="store_true", help="Keep each paper's debate in one conversation so Ollama reuses the cached paper prefix")
+    parser.add_argument("--delta_prompts", action="store_true", help="Revise only the fields the Advisor targets and merge the Student's answer as a patch")
+    parser.add_argument("--llm_time_budget", type=float, default=None, help="Seconds of LLM time for debates per run; afterwards debates stop after one round")
+    parser.add_argument("--batch_screening", action="store_true", help="Score abstracts in batches and only debate papers at or above --screening_threshold")
+    parser.add_argument("--screening_batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="Abstracts per batch screening call")
+    parser.add_argument("--screening_threshold", type=int, default=DEFAULT_THRESHOLD, help="Minimum batch screening relevance (0-10) for a debate")
+    parser.add_argument("--prerank_top_k", type=int, default=None, help="Only screen the K candidates most similar to the key viewpoint (embedding pre-ranking; waits for the whole search unless --prerank_top_k_per_window is set)")
+    parser.add_argument("--prerank_top_k_per_window", type=int, default=None, help="Screen the K most similar of every --prerank_window candidates as the search streams in")
+    parser.add_argument("--prerank_window", type=int, default=DEFAULT_RANK_WINDOW, help="Candidates ranked together for --prerank_top_k_per_window")
+    parser.add_argument("--prerank_min_similarity", type=float, default=None, help="Only screen candidates with at least this cosine similarity to the key viewpoint")
+    parser.add_argument("--embedding_model", default=DEFAULT_EMBEDDING_MODEL, help="Ollama embedding model for pre-ranking")
+    parser.add_argument("--llm_cross_process", action="store_true", help="Share the LLM concurrency cap with other FindUrCite processes on this machine")
     args = parser.parse_args()
 
+    if args.llm_concurrency or args.llm_cross_process:
+        llm_governor.configure(max_concurrent=args.llm_concurrency, cross_process=args.llm_cross_process)
+
     user_text = args.input
     if os.path.exists(args.input) and os.path.isfile(args.input):
         try:
@@ -363,7 +520,14 @@ def main():
             print(f"[Main] Error reading file: {e}")
             return
 
-    pipeline = ResearchPipeline(model=args.model, output_dir=args.output, pdf_dir=args.pdf_dir)
+    pipeline = ResearchPipeline(model=args.model, output_dir=args.output, pdf_dir=args.pdf_dir,
+                                skip_code_for_rejected=args.skip_code_for_rejected, llm_cache=args.llm_cache, stream_llm=args.stream_llm,
+                                advisor_model=args.advisor_model, keep_alive=args.keep_alive, debate_sessions=args.debate_sessions,
+                                delta_prompts=args.delta_prompts, llm_time_budget=args.llm_time_budget,
+                                batch_screening=args.batch_screening, screening_batch_size=args.screening_batch_size,
+                                screening_threshold=args.screening_threshold, prerank_top_k=args.prerank_top_k,
+                                prerank_min_similarity=args.prerank_min_similarity, embedding_model=args.embedding_model,
+                                prerank_top_k_per_window=args.prerank_top_k_per_window, prerank_window=args.prerank_window)
     
     for event in pipeline.run(user_text):
         if event['type'] == 'log':
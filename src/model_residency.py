@@ -0,0 +1,77 @@
+import threading
+import time
+import ollama
+
+# Ollama unloads a model 5 minutes after its last request by default. A single model is kept a bit
+# longer so pauses between runs (e.g. in the web app) don't pay for a reload; when Student and Advisor
+# use different models both are kept for the whole run, so an idle one doesn't expire between rounds.
+DEFAULT_KEEP_ALIVE = '10m'
+SHARED_KEEP_ALIVE = '30m'
+
+def same_model(name, model):
+    return name == model or name == f"{model}:latest"
+
+def loaded_models():
+    """Names of the models Ollama currently holds in memory (None if Ollama can't be asked)."""
+    try:
+        return [entry.get('model') or entry.get('name') for entry in ollama.ps()['models']]
+    except Exception:
+        return None
+
+class ModelResidency:
+    """
+    Keeps the models of one run loaded in Ollama.
+    `keep_alive` is passed to every request of the run's agents; warm_up() loads the models ahead of
+    their first request on a background thread, and missing() reports models Ollama has evicted
+    (typically because OLLAMA_MAX_LOADED_MODELS or VRAM only fits one of them).
+    """
+    def __init__(self, models, keep_alive=None):
+        # Deduplicated, in first-use order: the Student model answers the first request of a run
+        self.models = list(dict.fromkeys(m for m in models if m))
+        if keep_alive is None:
+            keep_alive = SHARED_KEEP_ALIVE if len(self.models) > 1 else DEFAULT_KEEP_ALIVE
+        self.keep_alive = keep_alive
+        self.load_times = {}
+        self.errors = {}
+        self._thread = None
+
+    def warm_up(self, background=True):
+        """Load every model with an empty request, which loads the weights without generating."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._load_all, name="ollama-warm-up", daemon=True)
+        self._thread.start()
+        if not background:
+            self._thread.join()
+
+    def _load_all(self):
+        for model in self.models:
+            start = time.time()
+            try:
+                ollama.generate(model=model, prompt='', keep_alive=self.keep_alive)
+                self.load_times[model] = time.time() - start
+            except Exception as e:
+                self.errors[model] = str(e)
+
+    def ready(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready()
+
+    def missing(self):
+        """Models of this run that are not loaded right now (empty if Ollama can't be asked)."""
+        loaded = loaded_models()
+        if loaded is None:
+            return []
+        return [m for m in self.models if not any(same_model(name, m) for name in loaded)]
+
+    def release(self):
+        """Unload the run's models right away instead of waiting for keep_alive to expire."""
+        for model in self.models:
+            try:
+                ollama.generate(model=model, prompt='', keep_alive=0)
+            except Exception:
+                pass
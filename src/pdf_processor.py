@@ -1,10 +1,11 @@
 import os
-import requests
 import fitz
 import hashlib
+import http_client
 
 class PDFProcessor:
-    def __init__(self, download_dir="downloads"):
+    def __init__(self, download_dir="downloads", session=None):
+        self.session = session or http_client.get_session()
         self.set_download_dir(download_dir)
 
     def set_download_dir(self, new_dir):
@@ -34,14 +35,15 @@ class PDFProcessor:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=15, stream=True)
-            if response.status_code == 200:
-                with open(local_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                return local_path
-            else:
-                return None
+            # The context manager releases the pooled connection even on partial reads
+            with self.session.get(url, headers=headers, timeout=15, stream=True) as response:
+                if response.status_code == 200:
+                    with open(local_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                    return local_path
+                else:
+                    return None
         except Exception:
             return None
 
@@ -0,0 +1,131 @@
+import math
+import threading
+import ollama
+from cache import EmbeddingCache
+
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+# Texts per Ollama embed request
+DEFAULT_EMBED_BATCH = 32
+# Candidates ranked together with `top_k_per_window`
+DEFAULT_RANK_WINDOW = 20
+
+def cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def paper_text(paper, max_chars=2000):
+    return f"{paper.get('title', '')}\n{paper.get('abstract') or ''}"[:max_chars]
+
+class EmbeddingPreRanker:
+    """
+    Ranks search candidates by embedding similarity to the key viewpoint before any LLM screening.
+    Vectors come from an Ollama embedding model in batches and are cached on disk by content hash,
+    so a candidate seen in an earlier run is never embedded again.
+    Keeps the `top_k` most similar candidates and/or those with cosine similarity >= `min_similarity`.
+    `top_k` needs the whole candidate stream before anything is kept. With `top_k_per_window` instead,
+    the stream is ranked in windows of `window` candidates and the best of each window are kept as soon as
+    the window is full, still never more than `top_k` in total if that is set too.
+    If the embedding model is unavailable every candidate is kept, so screening behaves as before.
+    """
+    def __init__(self, model=DEFAULT_EMBEDDING_MODEL, top_k=None, min_similarity=None, batch_size=DEFAULT_EMBED_BATCH,
+                 cache=None, top_k_per_window=None, window=DEFAULT_RANK_WINDOW):
+        self.model = model
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.top_k_per_window = top_k_per_window
+        self.window = max(1, window)
+        self.batch_size = max(1, batch_size)
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self._lock = threading.Lock()
+        self._stats = {'candidates': 0, 'kept': 0, 'embedded': 0, 'cached': 0, 'failed': False}
+
+    def embed(self, texts):
+        """One vector per text; cached vectors are reused and the rest are embedded in batches."""
+        vectors = [self.cache.get(self.model, text) for text in texts]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            response = ollama.embed(model=self.model, input=[texts[i] for i in chunk])
+            for i, vector in zip(chunk, response['embeddings']):
+                vectors[i] = vector
+                self.cache.set(self.model, texts[i], vector)
+        with self._lock:
+            self._stats['embedded'] += len(missing)
+            self._stats['cached'] += len(texts) - len(missing)
+        return vectors
+
+    def rank(self, viewpoint, papers):
+        """(similarity, paper) pairs, most similar first."""
+        if not papers:
+            return []
+        vectors = self.embed([viewpoint] + [paper_text(p) for p in papers])
+        query = vectors[0]
+        scored = [(cosine(query, v), p) for v, p in zip(vectors[1:], papers)]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored
+
+    def select(self, viewpoint, papers, top_k=None):
+        """The candidates worth screening (at most `top_k`), most similar first."""
+        try:
+            ranked = self.rank(viewpoint, papers)
+        except Exception as e:
+            print(f"[PreRanker] Embedding with {self.model} failed, keeping all candidates: {e}")
+            with self._lock:
+                self._stats['failed'] = True
+            kept = list(papers)
+        else:
+            if self.min_similarity is not None:
+                ranked = [(s, p) for s, p in ranked if s >= self.min_similarity]
+            if top_k is not None:
+                ranked = ranked[:top_k]
+            for similarity, paper in ranked:
+                paper['prerank_similarity'] = round(similarity, 4)
+            kept = [p for _, p in ranked]
+        with self._lock:
+            self._stats['candidates'] += len(papers)
+            self._stats['kept'] += len(kept)
+        return kept
+
+    def filter(self, viewpoint, candidates):
+        """
+        Wrap a candidate stream. With only `top_k`, the whole stream is ranked before the best candidates
+        are yielded (best first); with `top_k_per_window` or only `min_similarity`, candidates pass through
+        window by window (batch by batch), and a `top_k` cap ends the stream once that many were yielded.
+        """
+        if self.top_k_per_window is not None:
+            size = self.window
+        elif self.top_k is not None:
+            size = float('inf')
+        else:
+            size = self.batch_size
+        remaining = [self.top_k]
+
+        def flush(batch):
+            limit = self.top_k_per_window
+            if remaining[0] is not None:
+                limit = remaining[0] if limit is None else min(limit, remaining[0])
+            kept = self.select(viewpoint, batch, limit)
+            if remaining[0] is not None and not self._stats['failed']:
+                remaining[0] -= len(kept)
+            return kept
+
+        try:
+            batch = []
+            for paper in candidates:
+                batch.append(paper)
+                if len(batch) >= size:
+                    yield from flush(batch)
+                    batch = []
+                    if remaining[0] is not None and remaining[0] <= 0:
+                        return
+            if batch:
+                yield from flush(batch)
+        finally:
+            close = getattr(candidates, 'close', None)
+            if close:
+                close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from utils import get_output_dir
+
+# Token-bucket budgets per provider: (refill rate in requests/second, burst capacity).
+# Semantic Scholar asks unauthenticated clients for ~1 rps; arXiv asks for one request every 3 s;
+# GitHub REST search allows 10/min unauthenticated and 30/min with a token; GraphQL (token only) is
+# metered in points, 5000/hour, one point per search; Google Scholar has no published quota and blocks aggressively, so it gets the most conservative budget.
+PROVIDER_LIMITS = {
+    'semantic_scholar': (1.0, 3),
+    'arxiv': (1.0 / 3, 1),
+    'github': (10.0 / 60, 10),
+    'github_authenticated': (30.0 / 60, 30),
+    'github_graphql': (5000.0 / 3600, 20),
+    'google_scholar': (1.0 / 5, 2),
+}
+
+DEFAULT_MAX_WAIT = 60
+
+class RateLimiter:
+    """
+    Token-bucket limiter whose state lives in a small SQLite database, so the budget is shared by all
+    threads of a pipeline and by concurrent pipeline runs on the same host.
+    Response headers (Retry-After, X-RateLimit-Remaining / X-RateLimit-Reset) adjust the buckets.
+    """
+    def __init__(self, db_path=None, limits=None, timeout=30):
+        if db_path is None:
+            cache_dir = os.path.join(get_output_dir(), ".cache")
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            db_path = os.path.join(cache_dir, "rate_limits.db")
+        self.db_path = db_path
+        self.timeout = timeout
+        self.limits = dict(PROVIDER_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self._local = threading.local()
+
+        conn = self._get_conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " provider TEXT PRIMARY KEY,"
+            " tokens REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+
+    def _get_conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, conn, provider, now):
+        rate, burst = self.limits[provider]
+        row = conn.execute("SELECT tokens, updated_at, blocked_until FROM buckets WHERE provider = ?", (provider,)).fetchone()
+        if row is None:
+            return float(burst), 0.0
+        tokens, updated_at, blocked_until = row
+        tokens = min(float(burst), tokens + max(0.0, now - updated_at) * rate)
+        return tokens, blocked_until
+
+    def _store(self, conn, provider, tokens, blocked_until, now):
+        conn.execute(
+            "INSERT INTO buckets (provider, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(provider) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at, "
+            "blocked_until = excluded.blocked_until",
+            (provider, tokens, now, blocked_until)
+        )
+
+    def acquire(self, provider, max_wait=DEFAULT_MAX_WAIT):
+        """
+        Block until one request for `provider` is allowed. Returns False if that would take longer than max_wait.
+        Unknown providers are never limited.
+        """
+        if provider not in self.limits:
+            return True
+
+        rate, _ = self.limits[provider]
+        deadline = time.time() + max_wait
+        conn = self._get_conn()
+        while True:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, blocked_until = self._load(conn, provider, now)
+                if blocked_until <= now and tokens >= 1:
+                    self._store(conn, provider, tokens - 1, blocked_until, now)
+                    conn.execute("COMMIT")
+                    return True
+                self._store(conn, provider, tokens, blocked_until, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            if blocked_until > now:
+                wait = blocked_until - now
+            else:
+                wait = (1 - tokens) / rate if rate > 0 else 1.0
+            if now + wait > deadline:
+                return False
+            # Sleep in short slices so threads re-check state written by other processes
+            time.sleep(min(max(wait, 0.01), 1.0))
+
+    def release(self, provider):
+        """Return an unused token, e.g. when the server reports the request did not count against quota."""
+        if provider not in self.limits:
+            return
+        _, burst = self.limits[provider]
+        now = time.time()
+        conn = self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, blocked_until = self._load(conn, provider, now)
+            self._store(conn, provider, min(float(burst), tokens + 1), blocked_until, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def block(self, provider, seconds):
+        """Stop issuing requests to `provider` for the given number of seconds (e.g. after a 429 without Retry-After)."""
+        if provider not in self.limits or seconds <= 0:
+            return
+        now = time.time()
+        conn = self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, blocked_until = self._load(conn, provider, now)
+            self._store(conn, provider, tokens, max(blocked_until, now + seconds), now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update_from_response(self, provider, response):
+        """
+        Adapt the bucket to what the server reports. Returns the number of seconds the provider is blocked for.
+        """
+        if provider not in self.limits or response is None:
+            return 0
+        headers = response.headers or {}
+        now = time.time()
+
+        blocked_for = 0
+        retry_after = self._parse_retry_after(headers.get('Retry-After'), now)
+        if retry_after is not None:
+            blocked_for = retry_after
+
+        remaining = self._parse_float(headers.get('X-RateLimit-Remaining'))
+        reset_at = self._parse_float(headers.get('X-RateLimit-Reset'))
+        if remaining is not None and remaining < 1 and reset_at is not None:
+            blocked_for = max(blocked_for, reset_at - now)
+
+        if blocked_for <= 0 and remaining is None:
+            return 0
+
+        conn = self._get_conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, blocked_until = self._load(conn, provider, now)
+            if remaining is not None:
+                # Never hold more local tokens than the server says we have left
+                tokens = min(tokens, remaining)
+            if blocked_for > 0:
+                blocked_until = max(blocked_until, now + blocked_for)
+            self._store(conn, provider, tokens, blocked_until, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return max(0, blocked_for)
+
+    def _parse_float(self, value):
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _parse_retry_after(self, value, now):
+        if not value:
+            return None
+        seconds = self._parse_float(value)
+        if seconds is not None:
+            return max(0.0, seconds)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+        except (TypeError, ValueError):
+            return None
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """Return the process-wide limiter backed by research_results/.cache/rate_limits.db."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
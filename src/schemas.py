@@ -0,0 +1,256 @@
+import json
+
+# JSON Schemas for every structured agent prompt. They are passed to Ollama as `format`, which
+# constrains decoding to the schema, and used by validate() to check and coerce what comes back.
+
+def _string():
+    return {'type': 'string'}
+
+def _string_list(min_items=None, max_items=None):
+    schema = {'type': 'array', 'items': {'type': 'string'}}
+    if min_items is not None:
+        schema['minItems'] = min_items
+    if max_items is not None:
+        schema['maxItems'] = max_items
+    return schema
+
+def _score():
+    return {'type': 'integer', 'minimum': 0, 'maximum': 10}
+
+SCORES = {
+    'type': 'object',
+    'properties': {
+        'relevance': _score(),
+        'innovation': _score(),
+        'reliability': _score(),
+        'potential': _score(),
+        'total': _score(),
+    },
+    'required': ['relevance', 'innovation', 'reliability', 'potential', 'total'],
+}
+
+_ANALYSIS_PROPERTIES = {
+    'scores': SCORES,
+    'match_reasoning': _string(),
+    'sub_field': _string(),
+    'problem_def': _string(),
+    'methodology': _string(),
+    'method_keywords': _string(),
+    'algorithm_summary': _string(),
+    'experiments': _string(),
+    'limitations': _string(),
+    'critique': _string(),
+    'datasets': _string(),
+    'others': _string(),
+    'evidence_quotes': _string_list(),
+}
+
+INITIAL_ANALYSIS = {
+    'type': 'object',
+    'properties': _ANALYSIS_PROPERTIES,
+    'required': ['scores', 'match_reasoning', 'sub_field', 'problem_def', 'methodology', 'evidence_quotes'],
+}
+
+REVISED_ANALYSIS = {
+    'type': 'object',
+    'properties': dict(_ANALYSIS_PROPERTIES, defense=_string()),
+    'required': INITIAL_ANALYSIS['required'] + ['defense'],
+}
+
+# Fields of a paper analysis the Advisor can point the Student at in delta mode
+ANALYSIS_FIELDS = list(_ANALYSIS_PROPERTIES)
+
+ANALYSIS_PATCH = {
+    'type': 'object',
+    'properties': {
+        'defense': _string(),
+        # Only the fields that change; 'scores' may hold just the changed scores
+        'changes': {
+            'type': 'object',
+            'properties': dict(_ANALYSIS_PROPERTIES, scores=dict(SCORES, required=[])),
+        },
+    },
+    'required': ['defense', 'changes'],
+}
+
+REVIEW = {
+    'type': 'object',
+    'properties': {
+        'is_approved': {'type': 'boolean'},
+        'critique': _string(),
+        'score_correction': {'type': ['integer', 'null'], 'minimum': 0, 'maximum': 10},
+        'questions': _string_list(),
+    },
+    'required': ['is_approved', 'critique', 'score_correction', 'questions'],
+}
+
+TARGETED_REVIEW = {
+    'type': 'object',
+    'properties': dict(REVIEW['properties'], target_fields={
+        'type': 'array',
+        'items': {'type': 'string', 'enum': ANALYSIS_FIELDS},
+    }),
+    'required': REVIEW['required'] + ['target_fields'],
+}
+
+SYNTHESIS_REVIEW = {
+    'type': 'object',
+    'properties': {
+        'is_approved': {'type': 'boolean'},
+        'critique': _string(),
+    },
+    'required': ['is_approved', 'critique'],
+}
+
+SYNTHESIS = {
+    'type': 'object',
+    'properties': {
+        'state_of_art_summary': _string(),
+        'gap_analysis': _string(),
+        'strategic_recommendations': _string(),
+    },
+    'required': ['state_of_art_summary', 'gap_analysis', 'strategic_recommendations'],
+}
+
+INVESTIGATION_QUERIES = {
+    'type': 'object',
+    'properties': {
+        'queries': _string_list(min_items=1, max_items=3),
+    },
+    'required': ['queries'],
+}
+
+BATCH_SCREENING = {
+    'type': 'object',
+    'properties': {
+        'scores': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {'id': _string(), 'relevance': _score()},
+                'required': ['id', 'relevance'],
+            },
+        },
+    },
+    'required': ['scores'],
+}
+
+USER_INPUT_ANALYSIS = {
+    'type': 'object',
+    'properties': {
+        'core_contribution': _string(),
+        'sub_field': _string(),
+        'key_viewpoint': _string(),
+        'search_queries': _string_list(min_items=1),
+        'english_keywords': _string_list(),
+    },
+    'required': ['core_contribution', 'sub_field', 'key_viewpoint', 'search_queries', 'english_keywords'],
+}
+
+class SchemaError(ValueError):
+    def __init__(self, path, message):
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+def validate(data, schema, path="$"):
+    """
+    Check `data` against one of the schemas above and return a copy coerced to the declared types.
+    Common slips are fixed (numeric strings, "true"/"false", a bare string where a list is expected,
+    scores clamped to their range); anything else raises SchemaError.
+    Properties that are not in the schema are kept as they are.
+    """
+    types = schema.get('type')
+    if isinstance(types, str):
+        types = [types]
+    if data is None:
+        if 'null' in types:
+            return None
+        raise SchemaError(path, "missing value")
+
+    errors = []
+    for type_name in types:
+        if type_name == 'null':
+            continue
+        try:
+            return _COERCE[type_name](data, schema, path)
+        except SchemaError as e:
+            errors.append(e)
+    raise errors[0]
+
+def _coerce_object(data, schema, path):
+    if not isinstance(data, dict):
+        raise SchemaError(path, f"expected object, got {type(data).__name__}")
+    result = dict(data)
+    properties = schema.get('properties', {})
+    for name in schema.get('required', []):
+        if name not in data:
+            raise SchemaError(f"{path}.{name}", "required field is missing")
+    for name, sub_schema in properties.items():
+        if name in data:
+            result[name] = validate(data[name], sub_schema, f"{path}.{name}")
+    return result
+
+def _coerce_array(data, schema, path):
+    if isinstance(data, str):
+        data = [data] if data.strip() else []
+    if not isinstance(data, (list, tuple)):
+        raise SchemaError(path, f"expected array, got {type(data).__name__}")
+    items = schema.get('items')
+    result = [validate(v, items, f"{path}[{i}]") if items else v for i, v in enumerate(data)]
+    if len(result) < schema.get('minItems', 0):
+        raise SchemaError(path, f"expected at least {schema['minItems']} items")
+    if 'maxItems' in schema:
+        result = result[:schema['maxItems']]
+    return result
+
+def _coerce_string(data, schema, path):
+    if 'enum' in schema:
+        if data not in schema['enum']:
+            raise SchemaError(path, f"expected one of {schema['enum']}, got {data!r}")
+        return data
+    if isinstance(data, str):
+        return data
+    if isinstance(data, bool) or data is None:
+        raise SchemaError(path, f"expected string, got {type(data).__name__}")
+    if isinstance(data, (int, float)):
+        return str(data)
+    if isinstance(data, list) and all(isinstance(v, str) for v in data):
+        return "; ".join(data)
+    if isinstance(data, (list, dict)):
+        return json.dumps(data, ensure_ascii=False)
+    raise SchemaError(path, f"expected string, got {type(data).__name__}")
+
+def _coerce_number(data, schema, path):
+    if isinstance(data, bool):
+        raise SchemaError(path, "expected number, got bool")
+    if isinstance(data, str):
+        try:
+            data = float(data.strip())
+        except ValueError:
+            raise SchemaError(path, f"expected number, got {data!r}")
+    if not isinstance(data, (int, float)):
+        raise SchemaError(path, f"expected number, got {type(data).__name__}")
+    if 'minimum' in schema:
+        data = max(schema['minimum'], data)
+    if 'maximum' in schema:
+        data = min(schema['maximum'], data)
+    return data
+
+def _coerce_integer(data, schema, path):
+    return int(round(_coerce_number(data, schema, path)))
+
+def _coerce_boolean(data, schema, path):
+    if isinstance(data, bool):
+        return data
+    if isinstance(data, str) and data.strip().lower() in ('true', 'false'):
+        return data.strip().lower() == 'true'
+    raise SchemaError(path, f"expected boolean, got {data!r}")
+
+_COERCE = {
+    'object': _coerce_object,
+    'array': _coerce_array,
+    'string': _coerce_string,
+    'number': _coerce_number,
+    'integer': _coerce_integer,
+    'boolean': _coerce_boolean,
+}
@@ -0,0 +1,80 @@
+import concurrent.futures
+import threading
+
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_THRESHOLD = 4
+# Seconds a paper waits for its batch to fill before the papers collected so far are scored anyway
+DEFAULT_LINGER = 2.0
+
+class BatchScreener:
+    """
+    Fast relevance pre-screen that scores up to `batch_size` abstracts in one LLM call.
+    Batch screening workers call score(paper) concurrently; the call that fills a batch (or whose paper has
+    waited `linger` seconds) runs it for everyone waiting, so no extra thread is needed.
+    Papers scoring below `threshold` skip the debate; a paper the LLM did not score gets None and is
+    debated as before.
+    """
+    def __init__(self, student, user_context, batch_size=DEFAULT_BATCH_SIZE, threshold=DEFAULT_THRESHOLD, linger=DEFAULT_LINGER):
+        self.student = student
+        self.user_context = user_context
+        self.batch_size = max(1, batch_size)
+        self.threshold = threshold
+        self.linger = linger
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'papers': 0, 'unscored': 0, 'passed': 0, 'screened_out': 0}
+
+    def score(self, paper):
+        """Relevance (0-10) of `paper` from its batch, or None if it could not be scored."""
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._pending.append((paper, future))
+            batch = self._take() if len(self._pending) >= self.batch_size else None
+        if batch:
+            self._run(batch)
+        else:
+            try:
+                return future.result(timeout=self.linger)
+            except concurrent.futures.TimeoutError:
+                with self._lock:
+                    batch = self._take() if any(f is future for _, f in self._pending) else None
+                if batch:
+                    self._run(batch)
+        return future.result()
+
+    def passes(self, score):
+        passed = score is None or score >= self.threshold
+        with self._lock:
+            self._stats['passed' if passed else 'screened_out'] += 1
+        return passed
+
+    def screened_out_analysis(self, score):
+        """Analysis recorded for a paper that is not debated."""
+        return {
+            'scores': {'relevance': score, 'total': score},
+            'relevance_score': score,
+            'match_reasoning': f"Batch screening scored the abstract {score}/10, below the threshold of {self.threshold}; not debated.",
+        }
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _take(self):
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        return batch
+
+    def _run(self, batch):
+        scores = [None] * len(batch)
+        try:
+            scores = self.student.screen_abstracts(self.user_context, [paper for paper, _ in batch])
+        except Exception as e:
+            print(f"[BatchScreener] Batch of {len(batch)} failed: {e}")
+        finally:
+            scores = (list(scores or []) + [None] * len(batch))[:len(batch)]
+            with self._lock:
+                self._stats['batches'] += 1
+                self._stats['papers'] += len(batch)
+                self._stats['unscored'] += sum(1 for s in scores if s is None)
+            for (_, future), score in zip(batch, scores):
+                future.set_result(score)
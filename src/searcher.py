@@ -1,66 +1,165 @@
-import requests
-import time
+import asyncio
+import functools
+import threading
+import queue
+import heapq
 import feedparser
 import urllib.parse
 import os
 import hashlib
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from utils import get_output_dir
+from cache import SQLiteCacheBackend
+import http_client
+from rate_limiter import get_rate_limiter
+from dedup import DedupIndex, normalize_arxiv_id, normalize_doi, paper_key
+from keyword_matcher import KeywordMatcher
 
 try:
     from scholarly import scholarly
 except ImportError:
     scholarly = None
 
+# Default cache lifetimes per source (seconds). ArXiv listings change daily;
+# Google Scholar is slow and aggressively rate-limited, so its results are kept longest.
+SOURCE_CACHE_TTLS = {
+    'semantic_scholar': 7 * 24 * 3600,
+    'arxiv': 24 * 3600,
+    'google_scholar': 14 * 24 * 3600,
+}
+
+# Max in-flight requests per source for one Searcher, across every search running on it
+# (e.g. debate investigation searches next to the main streamed search). Each source's blocking
+# client calls run on that source's own executor with this many threads.
+SOURCE_CONCURRENCY = {
+    'semantic_scholar': 2,
+    'arxiv': 2,
+    'google_scholar': 1,
+}
+
+# Bump when the shape of cached result records changes so old entries are ignored.
+CACHE_SCHEMA_VERSION = 3
+
+SS_FIELDS = "title,abstract,authors.name,authors.affiliations,year,citationCount,url,externalIds,venue,openAccessPdf"
+
+# Upstream API identity that is part of every cache fingerprint
+SOURCE_API_VERSIONS = {
+    'semantic_scholar': 'graph/v1/paper/search',
+    'arxiv': 'api/query',
+    'google_scholar': 'scholarly/search_pubs',
+}
+
+def _snapshot(record):
+    """Copy of a dedup record that later merges into the index's record won't touch."""
+    snapshot = dict(record)
+    snapshot['sources'] = list(record.get('sources') or [])
+    return snapshot
+
 class Searcher:
-    def __init__(self):
+    def __init__(self, cache_backend=None, cache_ttls=None, cache_max_entries=20000, cache_max_bytes=100 * 1024 * 1024, session=None, source_concurrency=None, rate_limiter=None):
         self.ss_url = "https://api.semanticscholar.org/graph/v1/paper/search"
         self.arxiv_url = "http://export.arxiv.org/api/query"
         self.headers = {
             "User-Agent": "FindUrCite/1.0 (mailto:user@example.com)"
         }
+        self.session = session or http_client.get_session()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         self.cache_dir = os.path.join(get_output_dir(), ".cache")
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
         self.cache_file = os.path.join(self.cache_dir, "search_cache.json")
-        self.cache = self._load_cache()
+        if cache_backend is None:
+            cache_backend = SQLiteCacheBackend(
+                os.path.join(self.cache_dir, "search_cache.db"),
+                default_ttl=SOURCE_CACHE_TTLS['semantic_scholar'],
+                max_entries=cache_max_entries,
+                max_bytes=cache_max_bytes
+            )
+            # Only the default store ever imported the legacy file; an injected backend (e.g. a
+            # JSONCacheBackend) may be using that very path
+            self._drop_legacy_cache(cache_backend)
+        self.cache = cache_backend
+        self.cache_ttls = dict(SOURCE_CACHE_TTLS)
+        if cache_ttls:
+            self.cache_ttls.update(cache_ttls)
+        self.source_concurrency = dict(SOURCE_CONCURRENCY)
+        if source_concurrency:
+            self.source_concurrency.update(source_concurrency)
+        self._executors = {}
+        self._executor_lock = threading.Lock()
 
-    def _load_cache(self):
-        if os.path.exists(self.cache_file):
+    def _drop_legacy_cache(self, cache):
+        """
+        The old JSON cache was keyed by md5(query), which no lookup produces any more. Rows an earlier
+        version imported from it are deleted once, and the file (or its *.migrated copy) is removed.
+        """
+        for path in (self.cache_file, self.cache_file + ".migrated"):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+            except Exception:
+                legacy = None
+            if isinstance(legacy, dict):
+                for key in legacy:
+                    try:
+                        cache.delete(key)
+                    except Exception:
+                        pass
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+                os.remove(path)
+            except OSError:
+                pass
 
-    def _save_cache(self):
-        try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except:
-            pass
+    def _normalize_query(self, query):
+        query = unicodedata.normalize('NFKC', query or '').lower()
+        return re.sub(r'\s+', ' ', query).strip()
+
+    def _get_cache_key(self, query, source):
+        """
+        Canonical request fingerprint. The result limit is deliberately not part of it: entries store
+        the limit they were fetched with, so a larger cached result can serve a smaller request.
+        """
+        fingerprint = {
+            'v': CACHE_SCHEMA_VERSION,
+            'source': source,
+            'api': SOURCE_API_VERSIONS.get(source),
+            'query': self._normalize_query(query),
+            'fields': SS_FIELDS if source == 'semantic_scholar' else None,
+        }
+        payload = json.dumps(fingerprint, sort_keys=True, ensure_ascii=False)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
 
-    def _get_cache_key(self, query):
-        return hashlib.md5(query.lower().strip().encode('utf-8')).hexdigest()
+    def cache_stats(self):
+        try:
+            return self.cache.get_stats()
+        except Exception:
+            return {}
 
     def search_semantic_scholar(self, query, limit=5, retries=3):
         params = {
             "query": query,
             "limit": limit,
-            "fields": "title,abstract,authors.name,authors.affiliations,year,citationCount,url,externalIds,venue,openAccessPdf"
+            "fields": SS_FIELDS
         }
         
         for attempt in range(retries):
+            if not self.rate_limiter.acquire('semantic_scholar'):
+                break
             try:
-                response = requests.get(self.ss_url, params=params, headers=self.headers, timeout=10)
+                response = self.session.get(self.ss_url, params=params, headers=self.headers, timeout=10)
+                blocked_for = self.rate_limiter.update_from_response('semantic_scholar', response)
                 if response.status_code == 200:
                     data = response.json()
                     return self._process_ss_results(data.get('data', []))
                 elif response.status_code == 429:
-                    wait_time = (2 ** attempt) * 2
-                    time.sleep(wait_time)
+                    # No Retry-After: back off exponentially, shared with every other caller
+                    if not blocked_for:
+                        self.rate_limiter.block('semantic_scholar', (2 ** attempt) * 2)
                 else:
                     break
             except Exception:
@@ -99,7 +198,10 @@ class Searcher:
                 'venue': item.get('venue'),
                 'authors': authors_formatted,
                 'affiliations': list(affiliations_set),
-                'paperId': item.get('paperId')
+                'paperId': item.get('paperId'),
+                'externalIds': item.get('externalIds') or {},
+                'doi': normalize_doi((item.get('externalIds') or {}).get('DOI')),
+                'arxivId': normalize_arxiv_id((item.get('externalIds') or {}).get('ArXiv'))
             }
             results.append(result)
         return results
@@ -108,8 +210,14 @@ class Searcher:
         encoded_query = urllib.parse.quote(query)
         url = f"{self.arxiv_url}?search_query=all:{encoded_query}&start=0&max_results={limit}"
         
+        if not self.rate_limiter.acquire('arxiv'):
+            return []
         try:
-            feed = feedparser.parse(url)
+            response = self.session.get(url, headers=self.headers, timeout=15)
+            self.rate_limiter.update_from_response('arxiv', response)
+            if response.status_code != 200:
+                return []
+            feed = feedparser.parse(response.content)
             return self._process_arxiv_results(feed.entries)
         except Exception:
             return []
@@ -118,6 +226,9 @@ class Searcher:
         if not scholarly:
             return []
 
+        if not self.rate_limiter.acquire('google_scholar'):
+            return []
+
         results = []
         try:
             search_query = scholarly.search_pubs(query)
@@ -170,103 +281,259 @@ class Searcher:
                 'venue': 'ArXiv',
                 'authors': [a.name for a in entry.authors],
                 'affiliations': [],
-                'paperId': entry.id.split('/')[-1]
+                'paperId': entry.id.split('/')[-1],
+                'arxivId': normalize_arxiv_id(entry.id),
+                'doi': normalize_doi(entry.get('arxiv_doi'))
             }
             results.append(result)
         return results
 
+    def _source_fetchers(self):
+        return {
+            'semantic_scholar': self.search_semantic_scholar,
+            'arxiv': self.search_arxiv,
+            'google_scholar': self.search_google_scholar,
+        }
+
+    def _get_executor(self, source):
+        with self._executor_lock:
+            executor = self._executors.get(source)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.source_concurrency.get(source, 1)),
+                    thread_name_prefix=f"searcher-{source}"
+                )
+                self._executors[source] = executor
+            return executor
+
+    def close(self):
+        with self._executor_lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False)
+
+    def _run_sync(self, coro):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Already inside an event loop on this thread (e.g. a notebook): run on a helper thread
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+
+    def _cache_lookup(self, query, source, limit):
+        try:
+            entry = self.cache.get(self._get_cache_key(query, source))
+        except Exception:
+            return None
+        if not isinstance(entry, dict) or 'results' not in entry:
+            return None
+
+        results = entry['results']
+        cached_limit = entry.get('limit', 0)
+        # Usable if it was fetched with at least this limit, or the source had fewer hits than it was asked for
+        if cached_limit >= limit or len(results) < cached_limit:
+            return results[:limit]
+        return None
+
+    def _cache_store(self, query, source, limit, results):
+        # Empty lists are usually transient failures (timeouts, 429s); don't pin them
+        if not results:
+            return
+        try:
+            self.cache.set(
+                self._get_cache_key(query, source),
+                {'limit': limit, 'results': results},
+                ttl=self.cache_ttls.get(source)
+            )
+        except Exception:
+            pass
+
+    async def _async_fetch_source(self, source, query, limit):
+        cached = self._cache_lookup(query, source, limit)
+        if cached is not None:
+            return cached
+
+        fetcher = self._source_fetchers()[source]
+        loop = asyncio.get_running_loop()
+        # The source's executor caps in-flight requests, whichever event loop they come from
+        try:
+            results = await loop.run_in_executor(self._get_executor(source), functools.partial(fetcher, query, limit=limit))
+        except Exception:
+            results = []
+
+        self._cache_store(query, source, limit, results)
+        return results
+
+    def _merge_source_results(self, results_per_source):
+        index = DedupIndex()
+        for results in results_per_source:
+            for res in results:
+                index.add(res)
+        return index.records()
+
+    async def async_search_all(self, query, limit_per_source=5):
+        sources = list(self._source_fetchers())
+        results_per_source = await asyncio.gather(*[
+            self._async_fetch_source(source, query, limit_per_source) for source in sources
+        ])
+        return self._merge_source_results(results_per_source)
+
     def search_all(self, query, limit_per_source=5):
-        cache_key = self._get_cache_key(query)
-        if cache_key in self.cache:
-            return self.cache[cache_key]
-
-        # Use max_workers=3 to accommodate Google Scholar
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_ss = executor.submit(self.search_semantic_scholar, query, limit=limit_per_source)
-            future_arxiv = executor.submit(self.search_arxiv, query, limit=limit_per_source)
-            future_gs = executor.submit(self.search_google_scholar, query, limit=limit_per_source)
-            
-            ss_results = future_ss.result()
-            arxiv_results = future_arxiv.result()
-            try:
-                gs_results = future_gs.result()
-            except Exception:
-                gs_results = []
-        
-        all_results = ss_results + arxiv_results + gs_results
-        seen_titles = set()
-        unique_results = []
-        
-        for res in all_results:
-            normalized_title = res['title'].lower().strip()
-            if normalized_title not in seen_titles:
-                seen_titles.add(normalized_title)
-                unique_results.append(res)
-        
-        self.cache[cache_key] = unique_results
-        self._save_cache()
-        
-        return unique_results
+        return self._run_sync(self.async_search_all(query, limit_per_source))
 
-    def search_multiple_queries(self, queries, limit_per_source=5, keywords_filter=None):
-        seen_titles = set()
+    async def async_search_multiple_queries(self, queries, limit_per_source=5, keywords_filter=None):
+        """
+        Search every query against every source on one event loop.
+        The blocking clients run on per-source executors, which cap each source's in-flight requests.
+        """
+        valid_queries = [q for q in queries if q and len(q.strip()) >= 3]
+
+        per_query_results = await asyncio.gather(*[
+            self.async_search_all(q, limit_per_source) for q in valid_queries
+        ])
+
+        index = DedupIndex()
+        accepted = set()
         all_candidates = [] 
-        filter_terms = [k.lower().strip() for k in keywords_filter] if keywords_filter else []
+        for results in per_query_results:
+            for res in results:
+                record = self._accept_candidate(res, index, accepted)
+                if record is not None:
+                    all_candidates.append(record)
+
+        return self._filter_candidates(all_candidates, keywords_filter)
+
+    def search_multiple_queries(self, queries, limit_per_source=5, keywords_filter=None):
+        return self._run_sync(self.async_search_multiple_queries(queries, limit_per_source, keywords_filter))
 
+    async def async_iter_search_multiple_queries(self, queries, limit_per_source=5, keywords_filter=None):
+        """
+        Async generator over the same candidates as async_search_multiple_queries, yielded as soon as
+        any (query, source) request returns. Keyword matches stream immediately; adaptive fallback
+        papers can only be chosen once every source has answered, so they come last.
+        Each paper is yielded as a copy: the dedup index keeps merging later duplicates into its own
+        record, and consumers on other threads must not see that record change under them.
+        """
         valid_queries = [q for q in queries if q and len(q.strip()) >= 3]
+        matcher = self._build_keyword_matcher(keywords_filter)
 
-        with ThreadPoolExecutor(max_workers=min(5, len(valid_queries) + 1)) as executor:
-            future_to_query = {executor.submit(self.search_all, q, limit_per_source): q for q in valid_queries}
-            
-            for future in as_completed(future_to_query):
-                results = future.result()
+        tasks = [
+            asyncio.ensure_future(self._async_fetch_source(source, q, limit_per_source))
+            for q in valid_queries
+            for source in self._source_fetchers()
+        ]
+
+        index = DedupIndex()
+        accepted = set()
+        all_candidates = []
+        filtered_results = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                results = await next_done
                 for res in results:
-                    normalized_title = res['title'].lower().strip()
-                    
-                    if normalized_title in seen_titles:
-                        continue
-                    
-                    if not res.get('abstract') or len(res.get('abstract')) < 50:
+                    record = self._accept_candidate(res, index, accepted)
+                    if record is None:
                         continue
-                    
-                    seen_titles.add(normalized_title)
-                    all_candidates.append(res)
+                    all_candidates.append(record)
+                    if not matcher or self._matches_keywords(record, matcher):
+                        filtered_results.append(record)
+                        yield _snapshot(record)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        filtered_results = []
-        
-        if filter_terms:
-            for res in all_candidates:
-                normalized_title = res['title'].lower().strip()
-                abstract_text = (res.get('abstract') or "").lower()
-                combined_text = normalized_title + " " + abstract_text
-                
-                match_found = False
-                for term in filter_terms:
-                    if term in combined_text:
-                        match_found = True
+        for res in self._adaptive_fallback(all_candidates, filtered_results):
+            yield _snapshot(res)
+
+    def iter_search_multiple_queries(self, queries, limit_per_source=5, keywords_filter=None):
+        """
+        Blocking generator wrapper around async_iter_search_multiple_queries.
+        The event loop runs on a helper thread; closing the generator stops it.
+        """
+        results = queue.Queue()
+        stop = threading.Event()
+        done = object()
+
+        async def pump():
+            agen = self.async_iter_search_multiple_queries(queries, limit_per_source, keywords_filter)
+            try:
+                async for res in agen:
+                    if stop.is_set():
                         break
-                
-                if match_found:
-                    filtered_results.append(res)
+                    results.put(res)
+            finally:
+                await agen.aclose()
+
+        def runner():
+            try:
+                asyncio.run(pump())
+            except Exception as e:
+                print(f"[Searcher] Streaming search failed: {e}")
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=runner, name="searcher-stream", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+
+    def _accept_candidate(self, res, index, accepted):
+        """
+        Merge `res` into the dedup index and return its merged record the first time that record
+        qualifies as a candidate (has a usable abstract); otherwise None.
+        """
+        record, _ = index.add(res)
+        
+        if id(record) in accepted:
+            return None
+        
+        if not record.get('abstract') or len(record.get('abstract')) < 50:
+            return None
+        
+        accepted.add(id(record))
+        return record
+
+    def _build_keyword_matcher(self, keywords_filter):
+        return KeywordMatcher(keywords_filter or [])
+
+    def _matches_keywords(self, res, matcher):
+        combined_text = (res.get('title') or "") + " " + (res.get('abstract') or "")
+        return matcher.matches(combined_text)
+
+    def _adaptive_fallback(self, all_candidates, filtered_results, min_results=5):
+        if len(filtered_results) >= min_results or len(all_candidates) <= len(filtered_results):
+            return []
+
+        selected = {paper_key(p) for p in filtered_results}
+        rejected = [p for p in all_candidates if paper_key(p) not in selected]
+        
+        def get_citations(p):
+            c = p.get('citations')
+            if isinstance(c, int): return c
+            if isinstance(c, str) and c.isdigit(): return int(c)
+            return 0
+        
+        needed = (min_results * 2) - len(filtered_results)
+        # Same result as a stable descending sort truncated to `needed`, without sorting everything
+        fallback_papers = heapq.nlargest(needed, rejected, key=get_citations)
+        for p in fallback_papers:
+            p['adaptive_fallback'] = True 
+        return fallback_papers
+
+    def _filter_candidates(self, all_candidates, keywords_filter=None):
+        matcher = self._build_keyword_matcher(keywords_filter)
+
+        if matcher:
+            filtered_results = [res for res in all_candidates if self._matches_keywords(res, matcher)]
         else:
-            filtered_results = all_candidates
+            filtered_results = list(all_candidates)
 
-        min_results = 5
-        if len(filtered_results) < min_results and len(all_candidates) > len(filtered_results):
-            rejected = [p for p in all_candidates if p not in filtered_results]
-            
-            def get_citations(p):
-                c = p.get('citations')
-                if isinstance(c, int): return c
-                if isinstance(c, str) and c.isdigit(): return int(c)
-                return 0
-            
-            rejected.sort(key=get_citations, reverse=True)
-            needed = (min_results * 2) - len(filtered_results)
-            fallback_papers = rejected[:needed]
-            for p in fallback_papers:
-                p['adaptive_fallback'] = True 
-            
-            filtered_results.extend(fallback_papers)
-            
+        filtered_results.extend(self._adaptive_fallback(all_candidates, filtered_results))
         return filtered_results
@@ -0,0 +1,167 @@
+import queue
+import threading
+from event_bus import EventBus
+
+_STOP = object()
+
+class Stage:
+    """
+    One step of a StageGraph.
+    `handler(item)` returns (next_stage_name, item) to forward the item, or (None, result) to finish it.
+    `capacity` bounds the stage's input queue (None = unbounded), so a slow stage pushes back on its producers.
+    If the handler raises, `on_error(item, error)` returns the result the item finishes with; by default
+    the result is {'item': item, 'error': message}, so a failed item is reported rather than dropped.
+    """
+    def __init__(self, name, handler, workers=1, capacity=None, on_error=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.capacity = capacity
+        self.on_error = on_error
+
+class StageGraph:
+    """
+    Streaming executor for per-item pipelines. Every item moves through the stages on its own,
+    so a later stage starts on the first item while earlier stages are still busy with the rest.
+    The entry stage's queue is always unbounded so submit() never blocks the producer.
+
+    Handlers may call emit(event) to publish progress; stream() blocks on the output bus and yields
+    ('event', event) and ('result', result) tuples the moment they are produced, returning once the input
+    is closed and every submitted item has finished. feed() adds a ('fed', count) entry when its source
+    is exhausted. The output bus is bounded by `output_capacity`, so a slow consumer stalls the workers.
+    """
+    def __init__(self, stages, output_capacity=None):
+        if not stages:
+            raise ValueError("StageGraph needs at least one stage")
+        self.stages = {stage.name: stage for stage in stages}
+        self.entry = stages[0].name
+        self._queues = {
+            stage.name: queue.Queue(maxsize=0 if stage.name == self.entry or not stage.capacity else stage.capacity)
+            for stage in stages
+        }
+        self._output = EventBus(output_capacity) if output_capacity is not None else EventBus()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._input_closed = False
+        self._done_sent = False
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for stage in self.stages.values():
+            for i in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(stage,), name=f"stage-{stage.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, item):
+        with self._lock:
+            if self._input_closed:
+                raise RuntimeError("StageGraph input is closed")
+            self._in_flight += 1
+        self._queues[self.entry].put(item)
+
+    def close_input(self):
+        with self._lock:
+            self._input_closed = True
+        self._maybe_finish()
+
+    def feed(self, source, on_item=None):
+        """
+        Submit every item of `source` from a background thread, then close the input.
+        `on_item(item)` runs before each submission (e.g. to emit a progress event).
+        """
+        def run():
+            count = 0
+            try:
+                for item in source:
+                    if self._stopped.is_set():
+                        break
+                    if on_item:
+                        on_item(item)
+                    self.submit(item)
+                    count += 1
+            except Exception as e:
+                self.emit({"type": "log", "content": f"[feed] source error: {e}"})
+            finally:
+                close = getattr(source, 'close', None)
+                if close:
+                    close()
+                self._output.publish(('fed', count))
+                self.close_input()
+
+        thread = threading.Thread(target=run, name="stage-feed", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def emit(self, event):
+        self._output.publish(('event', event))
+
+    def stream(self):
+        return iter(self._output)
+
+    def output_stats(self):
+        return self._output.stats()
+
+    def shutdown(self):
+        self._stopped.set()
+        self._output.close()
+        for name, stage in self.stages.items():
+            for _ in range(stage.workers):
+                try:
+                    self._queues[name].put_nowait(_STOP)
+                except queue.Full:
+                    # Workers blocked on a full queue see the stop flag once they wake up
+                    pass
+
+    def _maybe_finish(self):
+        with self._lock:
+            if not self._input_closed or self._in_flight or self._done_sent:
+                return
+            self._done_sent = True
+        self._output.end()
+
+    def _finish_item(self, result):
+        self._output.publish(('result', result))
+        with self._lock:
+            self._in_flight -= 1
+        self._maybe_finish()
+
+    def _error_result(self, stage, item, error):
+        if stage.on_error is None:
+            return {'item': item, 'error': str(error)}
+        try:
+            return stage.on_error(item, error)
+        except Exception as e:
+            self.emit({"type": "log", "content": f"[{stage.name}] error handler failed: {e}"})
+            return {'item': item, 'error': str(error)}
+
+    def _worker(self, stage):
+        inbox = self._queues[stage.name]
+        while True:
+            item = inbox.get()
+            if item is _STOP or self._stopped.is_set():
+                return
+            try:
+                next_stage, payload = stage.handler(item)
+            except Exception as e:
+                self.emit({"type": "log", "content": f"[{stage.name}] stage error: {e}"})
+                next_stage, payload = None, self._error_result(stage, item, e)
+
+            if next_stage is None:
+                if payload is None:
+                    with self._lock:
+                        self._in_flight -= 1
+                    self._maybe_finish()
+                else:
+                    self._finish_item(payload)
+                continue
+
+            target = self._queues[next_stage]
+            while not self._stopped.is_set():
+                try:
+                    target.put(payload, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
@@ -337,6 +337,8 @@ with st.sidebar:
     # Load model name from environment variable (set by run.bat) or default
     default_model = os.environ.get("MODEL_NAME", "qwen2.5:7b")
     model_name = st.text_input("Ollama Model", value=default_model)
+    advisor_model_name = st.text_input("Advisor Model (optional)", value=os.environ.get("ADVISOR_MODEL_NAME", ""),
+                                       help="Leave empty to use the same model for Student and Advisor.")
     
     st.subheader("Configuration")
     # Base output dir is now the project dir, but we allow user to see it (read-only mostly)
@@ -443,6 +445,7 @@ if start_btn and user_input:
     
     pipeline = ResearchPipeline(
         model=model_name,
+        advisor_model=advisor_model_name.strip() or None,
         output_dir=run_output_dir,
         pdf_dir=os.path.join(run_output_dir, "pdfs")
     )
@@ -1,13 +1,37 @@
 import json
 from agents.student import StudentAgent
 from agents.advisor import AdvisorAgent
+from agents.base import llm_seconds
+from agents.session import DebateSession
 from cache import AnalysisCache
+from analysis_patch import apply_patch
+from debate_policy import DEFAULT_POLICIES, DebateStats
+import schemas
+
+STOP_MESSAGES = {
+    'max_rounds': "Max debate rounds reached.",
+    'converged': "Scores have converged.",
+    'repeated_critique': "The advisor raised no new points.",
+    'confident': "The verdict is clear.",
+    'budget': "The LLM time budget for this run is used up.",
+}
 
 class WorkflowOrchestrator:
-    def __init__(self, model="qwen2.5:7b"):
-        self.student = StudentAgent(model)
-        self.advisor = AdvisorAgent(model)
-        self.cache = AnalysisCache()
+    def __init__(self, model="qwen2.5:7b", response_cache=None, stream=False, advisor_model=None, keep_alive=None,
+                 debate_sessions=False, delta_prompts=False, policies=None, analysis_cache=None):
+        self.student = StudentAgent(model, response_cache=response_cache, stream=stream, keep_alive=keep_alive)
+        self.advisor = AdvisorAgent(advisor_model or model, response_cache=response_cache, stream=stream, keep_alive=keep_alive)
+        # None = the on-disk analysis cache; benchmarks pass a throwaway one so every debate really runs
+        self.cache = analysis_cache if analysis_cache is not None else AnalysisCache()
+        # Debate rounds share one paper prefix and continue a conversation instead of resending the paper
+        self.debate_sessions = debate_sessions
+        # The Advisor targets fields and the Student answers with a patch of the changed fields only
+        self.delta_prompts = delta_prompts
+        # Stopping policy per stage ('abstract' / 'full_text'); see debate_policy.py
+        self.policies = dict(DEFAULT_POLICIES, **(policies or {}))
+        # Optional LLMTimeBudget shared by the debates of one run
+        self.budget = None
+        self.debate_stats = DebateStats()
 
     def _normalize_score(self, score_val):
         if isinstance(score_val, dict):
@@ -31,9 +55,20 @@ class WorkflowOrchestrator:
             'match_reasoning': reason
         }
 
-    def analyze_paper_with_debate(self, user_viewpoint, paper, full_text=None, callback=None, searcher=None):
+    def _partial_scores_callback(self, callback, label):
+        """on_field hook for streamed student output: report the scores as soon as they are generated."""
+        if not callback:
+            return None
+        def on_field(key, value):
+            if key == 'scores' and isinstance(value, dict):
+                scores_display = "\n".join([f"- **{k.title()}**: {v}/10" for k, v in value.items()])
+                callback({'role': 'student', 'content': f"**[{label} (preliminary)]**\n\n**Scores (0-10):**\n{scores_display}", 'type': 'partial', 'data': {'scores': value}})
+        return on_field
+
+    def analyze_paper_with_debate(self, user_viewpoint, paper, full_text=None, callback=None, searcher=None, policy=None):
         """
         Executes the debate.
+        The number of rounds is decided by `policy`, by default the stage's policy in self.policies.
         If callback is provided, it calls callback(event_dict).
         Event dict structure: {'role': 'student'|'advisor', 'content': '...', 'type': 'analysis'|'critique'|'approval'}
         """
@@ -50,7 +85,8 @@ class WorkflowOrchestrator:
         if callback:
             callback({'role': 'system', 'content': f"Starting analysis for: {paper['title']}", 'type': 'info'})
 
-        analysis = self.student.analyze_initial(user_viewpoint, paper['title'], content_to_analyze)
+        analysis = self.student.analyze_initial(user_viewpoint, paper['title'], content_to_analyze,
+                                                on_field=self._partial_scores_callback(callback, "Student Analysis"))
         
         if 'scores' in analysis and isinstance(analysis['scores'], dict):
             analysis['relevance_score'] = self._normalize_score(analysis['scores'].get('relevance', 0))
@@ -67,14 +103,19 @@ class WorkflowOrchestrator:
             scores_display = "\n".join([f"- **{k.title()}**: {v}/10" for k, v in analysis.get('scores', {}).items()])
             callback({'role': 'student', 'content': f"**[Student Analysis]**\n\n**Scores (0-10):**\n{scores_display}\n\n**Why it matches:** {analysis.get('match_reasoning')}", 'type': 'analysis', 'data': analysis})
         
-        max_debate_rounds = 6
+        stage = 'full_text' if full_text else 'abstract'
+        policy = policy or self.policies[stage]
+        tracker = policy.start(self.budget, analysis, clock=llm_seconds)
+        stop_reason = None
+        session = DebateSession(paper['title'], content_to_analyze) if self.debate_sessions else None
         
-        for i in range(max_debate_rounds):
-            review = self.advisor.review_analysis(analysis, content_to_analyze, debate_round=i)
+        for i in range(policy.max_rounds):
+            review = self.advisor.review_analysis(analysis, content_to_analyze, debate_round=i, session=session, delta=self.delta_prompts)
             
             if review.get('is_approved'):
                 if callback:
                     callback({'role': 'advisor', 'content': "**[Advisor Decision]** ✅ Analysis Approved.", 'type': 'approval'})
+                stop_reason = 'approved'
                 break # Consensus Reached: Accepted
 
             advisor_score_val = review.get('score_correction')
@@ -98,6 +139,7 @@ class WorkflowOrchestrator:
                 if advisor_score < rejection_threshold and not questions:
                      if callback:
                         callback({'role': 'advisor', 'content': f"**[Advisor Decision]** ❌ Analysis Rejected (Score Corrected to {advisor_score}).", 'type': 'rejection'})
+                     stop_reason = 'rejected'
                      break
                 # If score is low BUT there are questions, allow the debate to continue (Interrogation)
                 elif advisor_score < rejection_threshold and questions:
@@ -135,7 +177,17 @@ class WorkflowOrchestrator:
                     callback({'role': 'advisor', 'content': f"**[Advisor Critique (Round {i+1})]**\n\n{review.get('critique')}", 'type': 'critique'})
 
             # Student Revision
-            analysis = self.student.revise_analysis(analysis, review.get('critique'), content_to_analyze, new_evidence=new_evidence)
+            revised = None
+            if self.delta_prompts:
+                patch = self.student.revise_analysis_patch(analysis, review.get('critique'), review.get('target_fields') or [],
+                                                           content_to_analyze, new_evidence=new_evidence, session=session)
+                revised = apply_patch(analysis, patch) if patch else None
+                if revised is None and callback:
+                    callback({'role': 'system', 'content': "Revision patch was invalid; regenerating the full analysis.", 'type': 'info'})
+            if revised is None:
+                revised = self.student.revise_analysis(analysis, review.get('critique'), content_to_analyze, new_evidence=new_evidence,
+                                                       on_field=self._partial_scores_callback(callback, "Student Revision"), session=session)
+            analysis = revised
             
             # Update score after revision
             if 'scores' in analysis and isinstance(analysis['scores'], dict):
@@ -145,11 +197,14 @@ class WorkflowOrchestrator:
                 scores_display = "\n".join([f"- **{k.title()}**: {v}/10" for k, v in analysis.get('scores', {}).items()])
                 callback({'role': 'student', 'content': f"**[Student Revision]**\n\n{analysis.get('defense')}\n\n**Updated Scores:**\n{scores_display}", 'type': 'analysis', 'data': analysis})
 
-            if i == max_debate_rounds - 1:
+            tracker.record_round(review, analysis)
+            stop_reason = tracker.stop_reason()
+            if stop_reason:
                 if callback:
-                    callback({'role': 'system', 'content': "**[System]** Max debate rounds reached. Ending debate.", 'type': 'info'})
+                    callback({'role': 'system', 'content': f"**[System]** {STOP_MESSAGES[stop_reason]} Ending debate.", 'type': 'info'})
                 break
-        
+
+        self.debate_stats.record(stage, i + 1, stop_reason, policy.max_rounds)
         self.cache.set(user_viewpoint, content_to_analyze, analysis)
         
         # Ensure critique is preserved in analysis for UI
@@ -203,7 +258,7 @@ class WorkflowOrchestrator:
         }}
         """
         
-        response = self.student.chat([{'role': 'user', 'content': prompt}])
+        response = self.student.chat([{'role': 'user', 'content': prompt}], schema=schemas.SYNTHESIS)
         
         if response and isinstance(response, dict):
             return response
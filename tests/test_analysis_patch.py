@@ -0,0 +1,29 @@
+from analysis_patch import apply_patch, diff_analysis
+
+ANALYSIS = {
+    'scores': {'relevance': 6, 'innovation': 5, 'reliability': 7, 'potential': 6, 'total': 6},
+    'relevance_score': 6,
+    'methodology': "Retrieval with reflection tokens",
+    'evidence_quotes': ["quote one"],
+}
+
+def test_patch_merges_scores_and_replaces_fields():
+    patch = {'defense': "The critique is right about verification.",
+             'changes': {'scores': {'relevance': 3, 'total': 4}, 'evidence_quotes': ["quote two"]}}
+    revised = apply_patch(ANALYSIS, patch)
+    assert revised['scores'] == {'relevance': 3, 'innovation': 5, 'reliability': 7, 'potential': 6, 'total': 4}
+    assert revised['evidence_quotes'] == ["quote two"]
+    assert revised['methodology'] == ANALYSIS['methodology']
+    assert revised['defense'] == patch['defense']
+    # The original is left untouched
+    assert ANALYSIS['scores']['relevance'] == 6 and 'defense' not in ANALYSIS
+
+def test_unusable_patches_are_rejected():
+    assert apply_patch(ANALYSIS, None) is None
+    assert apply_patch(ANALYSIS, {'defense': "", 'changes': {}}) is None
+    assert apply_patch(ANALYSIS, {'defense': "ok", 'changes': {'title': "new"}}) is None
+    assert apply_patch(ANALYSIS, {'defense': "ok", 'changes': {'scores': 5}}) is None
+
+def test_diff_reports_changed_fields_only():
+    revised = dict(ANALYSIS, relevance_score=3, methodology="Changed", critique="New")
+    assert diff_analysis(ANALYSIS, revised) == {'methodology': "Changed", 'critique': "New"}
@@ -0,0 +1,73 @@
+import time
+import pytest
+
+pytest.importorskip("requests")
+from code_finder import CodeFinder
+
+class MemoryCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.entries[key] = value
+
+class Limiter:
+    def acquire(self, provider, max_wait=None):
+        return True
+
+    def release(self, provider):
+        pass
+
+    def update_from_response(self, provider, response):
+        pass
+
+class Response:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+class Session:
+    def __init__(self):
+        self.graphql_queries = []
+        self.rest_headers = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.graphql_queries.append(json['variables'])
+        return Response(200, {'data': {name: {'nodes': []} for name in json['variables']}})
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.rest_headers.append(headers)
+        return Response(304)
+
+def make_finder():
+    return CodeFinder(session=Session(), rate_limiter=Limiter(), cache_backend=MemoryCache(),
+                      github_token="token", stale_after=3600)
+
+def test_fresh_graphql_entries_are_not_searched_again():
+    finder = make_finder()
+    finder.find_codes_parallel(["Paper A", "Paper B"])
+    assert len(finder.session.graphql_queries) == 1
+
+    # GraphQL results are cached without an ETag; while fresh they must be served from the cache
+    finder.find_codes_parallel(["Paper A", "Paper B"])
+    assert len(finder.session.graphql_queries) == 1
+    assert finder.session.rest_headers == []
+
+def test_stale_entries_with_etag_are_revalidated_over_rest():
+    finder = make_finder()
+    old = time.time() - 7200
+    finder.cache.set(finder._get_cache_key("Paper A"), {'results': [{'repo_name': "a"}], 'etag': 'W/"1"', 'fetched_at': old})
+    finder.cache.set(finder._get_cache_key("Paper B"), {'results': [], 'etag': None, 'fetched_at': old})
+
+    results = finder.find_codes_parallel(["Paper A", "Paper B"])
+    assert results["Paper A"] == [{'repo_name': "a"}]
+    assert [h.get('If-None-Match') for h in finder.session.rest_headers] == ['W/"1"']
+    # Only the stale entry without an ETag is searched again in a batch
+    assert [list(q.values()) for q in finder.session.graphql_queries] == [[finder._build_search_query("Paper B") + " sort:stars-desc"]]
@@ -0,0 +1,40 @@
+from debate_policy import DebateStats, LLMTimeBudget, StoppingPolicy
+
+def test_budget_is_charged_with_the_clock_not_wall_time():
+    budget = LLMTimeBudget(10)
+    llm_time = [0.0]
+    policy = StoppingPolicy(max_rounds=6, score_tolerance=None, critique_overlap=None)
+    tracker = policy.start(budget, {'relevance_score': 5}, clock=lambda: llm_time[0])
+
+    llm_time[0] += 4
+    tracker.record_round({'critique': "first"}, {'relevance_score': 5})
+    assert budget.spent == 4
+    assert tracker.stop_reason() is None
+
+    llm_time[0] += 7
+    tracker.record_round({'critique': "second"}, {'relevance_score': 5})
+    assert budget.spent == 11
+    assert tracker.stop_reason() == 'budget'
+
+def test_stops_on_converged_scores_and_confidence():
+    policy = StoppingPolicy(max_rounds=6, stable_rounds=2, critique_overlap=None)
+    tracker = policy.start(initial_analysis={'relevance_score': 6, 'scores': {'total': 6}})
+    tracker.record_round({'critique': "a"}, {'relevance_score': 6, 'scores': {'total': 6}})
+    assert tracker.stop_reason() is None
+    tracker.record_round({'critique': "b"}, {'relevance_score': 6, 'scores': {'total': 6}})
+    assert tracker.stop_reason() == 'converged'
+
+    confident = StoppingPolicy(max_rounds=3, reject_below=2).start()
+    confident.record_round({'critique': "c"}, {'relevance_score': 1})
+    assert confident.stop_reason() == 'confident'
+
+def test_rounds_saved_only_count_early_stops_against_the_policy_cap():
+    stats = DebateStats()
+    stats.record('abstract', 3, 'max_rounds', max_rounds=3)
+    stats.record('abstract', 1, 'confident', max_rounds=3)
+    stats.record('abstract', 1, 'approved', max_rounds=3)
+    stats.record('full_text', 2, 'converged', max_rounds=6)
+    result = stats.stats()
+    assert result['abstract']['saved'] == 2
+    assert result['abstract']['rounds'] == 5
+    assert result['full_text']['saved'] == 4
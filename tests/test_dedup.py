@@ -0,0 +1,60 @@
+from dedup import DedupIndex, normalize_arxiv_id, normalize_doi, normalize_title
+
+def test_normalizers():
+    assert normalize_title("Attention Is {All} You Need: $O(n)$") == "attention is all you need"
+    assert normalize_doi("https://doi.org/10.1000/ABC") == "10.1000/abc"
+    assert normalize_arxiv_id("https://arxiv.org/abs/2101.00001v2") == "2101.00001"
+
+def test_merges_across_sources_by_identifier():
+    index = DedupIndex()
+    index.add({'title': "A Paper", 'doi': "10.1/x", 'source': "Semantic Scholar", 'citations': 3})
+    record, is_new = index.add({'title': "A paper (preprint)", 'doi': "10.1/X", 'source': "ArXiv", 'abstract': "longer abstract"})
+    assert not is_new
+    assert record['sources'] == ["Semantic Scholar", "ArXiv"]
+    assert record['abstract'] == "longer abstract"
+    assert record['citations'] == 3
+
+def test_title_match_ignores_punctuation():
+    index = DedupIndex()
+    index.add({'title': "Retrieval augmented generation for code repositories", 'source': "ArXiv"})
+    _, is_new = index.add({'title': "Retrieval-augmented generation for code repositories.", 'source': "Google Scholar"})
+    assert not is_new
+    assert len(index) == 1
+
+def test_fuzzy_title_match():
+    long_title = "A scalable framework for retrieval augmented generation over large private code repositories"
+    index = DedupIndex()
+    index.add({'title': long_title, 'source': "ArXiv"})
+    # One dropped word: the normalized titles differ, so only the token-set similarity can match them
+    variant = long_title.replace(" large", "")
+    assert normalize_title(variant) != normalize_title(long_title)
+    record, is_new = index.add({'title': variant, 'source': "Google Scholar"})
+    assert not is_new
+    assert record['sources'] == ["ArXiv", "Google Scholar"]
+
+def test_short_near_miss_titles_stay_apart():
+    index = DedupIndex()
+    index.add({'title': "Deep learning for code", 'source': "ArXiv"})
+    _, is_new = index.add({'title': "Deep learning for images", 'source': "ArXiv"})
+    assert is_new
+    _, is_new = index.add({'title': "Graph neural network", 'source': "ArXiv"})
+    assert is_new
+    _, is_new = index.add({'title': "Graph neural networks", 'source': "ArXiv"})
+    assert is_new
+    assert len(index) == 4
+
+def test_readding_merged_records_keeps_provenance():
+    # Records that were already merged (e.g. within one query) carry a 'sources' list
+    per_query = DedupIndex()
+    per_query.add({'title': "Self-RAG", 'arxivId': "2310.11511", 'source': "Semantic Scholar"})
+    merged, _ = per_query.add({'title': "Self-RAG", 'arxivId': "2310.11511v1", 'source': "ArXiv"})
+    assert merged['sources'] == ["Semantic Scholar", "ArXiv"]
+
+    overall = DedupIndex()
+    record, is_new = overall.add(dict(merged))
+    assert is_new
+    assert record['sources'] == ["Semantic Scholar", "ArXiv"]
+
+    record, is_new = overall.add({'title': "Self-RAG", 'arxivId': "2310.11511", 'sources': ["Google Scholar", "ArXiv"], 'source': "Google Scholar"})
+    assert not is_new
+    assert record['sources'] == ["Semantic Scholar", "ArXiv", "Google Scholar"]
@@ -0,0 +1,53 @@
+import json
+from json_stream import IncrementalJSONParser
+
+OUTPUT = ('<think>Maybe {"draft": 1}?</think>\nSure: {"title": "A \\"quoted\\" {brace}", '
+          '"scores": {"relevance": 7, "total": 6}, "quotes": ["a, b", "c]"], "ok": true} trailing text')
+
+def feed_in_chunks(text, size):
+    fields = []
+    parser = IncrementalJSONParser(on_field=lambda key, value: fields.append((key, value)))
+    done_at = None
+    for start in range(0, len(text), size):
+        if parser.feed(text[start:start + size]):
+            done_at = start
+            break
+    return parser, fields, done_at
+
+def test_fields_across_every_chunk_boundary():
+    expected = json.loads(OUTPUT[OUTPUT.index('{"title"'):OUTPUT.rindex('}') + 1])
+    for size in range(1, 12):
+        parser, fields, done_at = feed_in_chunks(OUTPUT, size)
+        assert parser.done, size
+        assert dict(fields) == expected, size
+        assert [key for key, _ in fields] == list(expected), size
+        assert json.loads(parser.text) == expected, size
+        # Generation can stop as soon as the closing brace arrives
+        assert done_at <= OUTPUT.index(' trailing'), size
+
+def test_think_block_is_skipped_until_closed():
+    parser = IncrementalJSONParser()
+    assert not parser.feed('<think>{"draft": ')
+    assert not parser.feed('1}')
+    assert parser.fields == {}
+    assert parser.feed('</think>{"final": 2}')
+    assert parser.fields == {'final': 2}
+
+def test_incomplete_object():
+    parser = IncrementalJSONParser()
+    assert not parser.feed('{"a": 1, "b": [1, 2')
+    assert parser.fields == {'a': 1}
+    assert not parser.done
+
+def test_top_level_array_ends_at_its_closing_bracket():
+    output = '[{"id": "P1", "relevance": 7}, "a, b", {"id": "P2", "relevance": 3}] trailing'
+    for size in range(1, 8):
+        parser, fields, _ = feed_in_chunks(output, size)
+        assert parser.done, size
+        assert json.loads(parser.text) == json.loads(output[:output.rindex(']') + 1]), size
+        assert fields == [], size
+
+def test_incomplete_array_is_not_done():
+    parser = IncrementalJSONParser()
+    assert not parser.feed('[{"id": "P1"}, ')
+    assert not parser.done
@@ -0,0 +1,42 @@
+import random
+from keyword_matcher import NAIVE_TERM_LIMIT, KeywordMatcher
+
+def naive_matches(terms, text):
+    text = text.lower()
+    return any(t.lower().strip() in text for t in terms if t and t.strip())
+
+def automaton(terms):
+    matcher = KeywordMatcher(terms)
+    if matcher._delta is None:
+        matcher._build()
+    return matcher
+
+def test_overlapping_terms():
+    matcher = automaton(["he", "she", "hers", "his"])
+    assert matcher.search("usher") == "she"
+    assert matcher.search("aHIs") == "his"
+    assert matcher.search("xyz") is None
+    # A term that only ends behind a failure link of a longer partial match
+    assert automaton(["abcd", "bc"]).search("abce") == "bc"
+
+def test_large_term_sets_use_the_automaton():
+    terms = [f"term{i}" for i in range(NAIVE_TERM_LIMIT + 1)]
+    matcher = KeywordMatcher(terms)
+    assert matcher._delta is not None
+    assert matcher.matches(f"... TERM{NAIVE_TERM_LIMIT} ...")
+    assert not matcher.matches("no match here")
+
+def test_agrees_with_naive_substring_search():
+    rng = random.Random(7)
+    alphabet = "abc d"
+    for _ in range(300):
+        terms = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = "".join(rng.choice(alphabet + "ABC") for _ in range(rng.randint(0, 20)))
+        for matcher in (KeywordMatcher(terms), automaton(terms)):
+            assert matcher.matches(text) == naive_matches(terms, text), (terms, text)
+            found = matcher.search(text)
+            assert found is None or found in text.lower()
+
+def test_empty_terms_and_text():
+    assert not KeywordMatcher(["", "  "])
+    assert KeywordMatcher(["rag"]).search("") is None
@@ -0,0 +1,101 @@
+import threading
+import time
+from llm_governor import LLMGovernor, llm_priority
+
+def test_caps_in_flight_requests_per_model():
+    governor = LLMGovernor(max_concurrent=2, per_model={'small': 1})
+    peak = {'big': 0, 'small': 0}
+    running = {'big': 0, 'small': 0}
+    lock = threading.Lock()
+
+    def request(model):
+        with governor.slot(model):
+            with lock:
+                running[model] += 1
+                peak[model] = max(peak[model], running[model])
+            time.sleep(0.01)
+            with lock:
+                running[model] -= 1
+
+    threads = [threading.Thread(target=request, args=(model,)) for model in ['big'] * 6 + ['small'] * 4]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == {'big': 2, 'small': 1}
+    assert governor.stats()['big']['admitted'] == 6
+
+def test_admits_waiters_by_priority():
+    governor = LLMGovernor(max_concurrent=1)
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with governor.slot('m'):
+            release.wait()
+
+    def request(priority):
+        with llm_priority(priority):
+            with governor.slot('m'):
+                order.append(priority)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    waiters = []
+    for priority in ['screening', 'default', 'synthesis', 'full_text']:
+        t = threading.Thread(target=request, args=(priority,))
+        t.start()
+        waiters.append(t)
+        # Let each waiter queue up before the next arrives
+        while governor.stats()['m']['queued'] < len(waiters):
+            time.sleep(0.001)
+    release.set()
+    for t in [holder] + waiters:
+        t.join()
+    assert order == ['synthesis', 'full_text', 'default', 'screening']
+
+def test_stats_since_an_earlier_snapshot():
+    governor = LLMGovernor(max_concurrent=1)
+    with governor.slot('m'):
+        pass
+    before = governor.stats()
+    for _ in range(3):
+        with governor.slot('m'):
+            pass
+    assert governor.stats()['m']['admitted'] == 4
+    assert governor.stats(since=before)['m']['admitted'] == 3
+
+def test_interrupted_waiter_does_not_block_the_queue(monkeypatch):
+    governor = LLMGovernor(max_concurrent=1)
+    release = threading.Event()
+    holding = threading.Event()
+
+    def hold():
+        with governor.slot('m'):
+            holding.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait()
+
+    # The next waiter is interrupted inside the condition wait
+    def interrupted_wait(timeout=None):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(governor._cond, 'wait', interrupted_wait)
+    try:
+        with governor.slot('m', 'synthesis'):
+            pass
+    except KeyboardInterrupt:
+        pass
+    monkeypatch.undo()
+    assert governor.stats()['m']['queued'] == 0
+
+    release.set()
+    holder.join()
+    admitted = threading.Event()
+    def request():
+        with governor.slot('m'):
+            admitted.set()
+    threading.Thread(target=request, daemon=True).start()
+    assert admitted.wait(timeout=2)
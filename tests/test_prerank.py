@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("ollama")
+import prerank
+from prerank import EmbeddingPreRanker
+
+class MemoryEmbeddingCache:
+    def __init__(self):
+        self.vectors = {}
+
+    def get(self, model, text):
+        return self.vectors.get((model, text))
+
+    def set(self, model, text, vector):
+        self.vectors[(model, text)] = vector
+
+@pytest.fixture
+def embed(monkeypatch):
+    # Papers titled "p<score>" get a vector whose similarity to the viewpoint grows with <score>
+    def fake_embed(model, input):
+        return {'embeddings': [[1.0, 0.0] if text == "viewpoint" else [int(text.split()[0][1:]), 10.0] for text in input]}
+    monkeypatch.setattr(prerank.ollama, 'embed', fake_embed)
+
+def papers(*scores):
+    return [{'title': f"p{score}"} for score in scores]
+
+def test_top_k_keeps_the_best_of_the_whole_stream(embed):
+    ranker = EmbeddingPreRanker(top_k=2, cache=MemoryEmbeddingCache())
+    kept = ranker.filter("viewpoint", iter(papers(*range(1, 41))))
+    assert [p['title'] for p in kept] == ["p40", "p39"]
+    assert ranker.stats()['kept'] == 2
+
+def test_top_k_per_window_streams(embed):
+    pulled = []
+    def candidates():
+        for paper in papers(1, 9, 3, 8, 2, 7):
+            pulled.append(paper['title'])
+            yield paper
+
+    ranker = EmbeddingPreRanker(top_k_per_window=1, window=3, cache=MemoryEmbeddingCache())
+    stream = ranker.filter("viewpoint", candidates())
+    assert next(stream)['title'] == "p9"
+    # Only the first window has been consumed when its best candidate comes out
+    assert pulled == ["p1", "p9", "p3"]
+    assert [p['title'] for p in stream] == ["p8"]
+    assert ranker.stats()['candidates'] == 6
+
+def test_top_k_caps_the_windows_in_total(embed):
+    ranker = EmbeddingPreRanker(top_k=3, top_k_per_window=2, window=3, cache=MemoryEmbeddingCache())
+    kept = ranker.filter("viewpoint", iter(papers(1, 9, 3, 8, 2, 7, 6, 5, 4)))
+    assert [p['title'] for p in kept] == ["p9", "p3", "p8"]
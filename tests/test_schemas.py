@@ -0,0 +1,37 @@
+import pytest
+import schemas
+from schemas import SchemaError, validate
+
+def test_coerces_common_slips():
+    review = validate({'is_approved': "True", 'critique': ["too vague", "no baseline"],
+                       'score_correction': "7", 'questions': "Which dataset?"}, schemas.REVIEW)
+    assert review == {'is_approved': True, 'critique': "too vague; no baseline",
+                      'score_correction': 7, 'questions': ["Which dataset?"]}
+
+def test_clamps_scores_and_keeps_extra_properties():
+    scores = validate({'relevance': 12, 'innovation': -1, 'reliability': "6.6", 'potential': 5, 'total': 5, 'note': "x"},
+                      schemas.SCORES)
+    assert scores == {'relevance': 10, 'innovation': 0, 'reliability': 7, 'potential': 5, 'total': 5, 'note': "x"}
+
+def test_nullable_and_list_bounds():
+    assert validate(None, schemas.REVIEW['properties']['score_correction']) is None
+    assert validate({'queries': ["a", "b", "c", "d"]}, schemas.INVESTIGATION_QUERIES) == {'queries': ["a", "b", "c"]}
+    assert validate("", schemas.USER_INPUT_ANALYSIS['properties']['english_keywords']) == []
+
+@pytest.mark.parametrize("data, schema, path", [
+    ({'is_approved': True, 'critique': "ok"}, schemas.REVIEW, "$.score_correction"),
+    ({'is_approved': "maybe", 'critique': "ok"}, schemas.SYNTHESIS_REVIEW, "$.is_approved"),
+    ({'queries': []}, schemas.INVESTIGATION_QUERIES, "$.queries"),
+    ({'scores': [{'id': "P1", 'relevance': "high"}]}, schemas.BATCH_SCREENING, "$.scores[0].relevance"),
+    ([], schemas.SYNTHESIS, "$"),
+])
+def test_rejects_what_cannot_be_coerced(data, schema, path):
+    with pytest.raises(SchemaError) as info:
+        validate(data, schema)
+    assert info.value.path == path
+
+def test_enum_fields():
+    review = dict(is_approved=False, critique="c", score_correction=None, questions=[], target_fields=["methodology"])
+    assert validate(review, schemas.TARGETED_REVIEW)['target_fields'] == ["methodology"]
+    with pytest.raises(SchemaError):
+        validate(dict(review, target_fields=["title"]), schemas.TARGETED_REVIEW)
@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+import time
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("feedparser")
+import searcher
+from cache import JSONCacheBackend
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(searcher, 'get_output_dir', lambda: str(tmp_path))
+    return os.path.join(str(tmp_path), ".cache")
+
+def test_legacy_rows_are_dropped_from_the_default_store(cache_dir):
+    first = searcher.Searcher(rate_limiter=object(), session=object())
+    first.cache.set("legacy-key", [{'title': "old"}])
+    with open(first.cache_file, 'w', encoding='utf-8') as f:
+        json.dump({"legacy-key": [{'title': "old"}]}, f)
+    first.cache.close()
+
+    second = searcher.Searcher(rate_limiter=object(), session=object())
+    assert second.cache.get("legacy-key") is None
+    assert not os.path.exists(second.cache_file)
+
+def test_injected_json_backend_at_the_legacy_path_is_kept(cache_dir):
+    os.makedirs(cache_dir)
+    path = os.path.join(cache_dir, "search_cache.json")
+    backend = JSONCacheBackend(path)
+    backend.set("key", {'limit': 5, 'results': []})
+
+    instance = searcher.Searcher(cache_backend=JSONCacheBackend(path), rate_limiter=object(), session=object())
+    assert instance.cache.get("key") == {'limit': 5, 'results': []}
+    assert os.path.exists(path)
+
+class MemoryCache:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+def test_source_limits_hold_across_concurrent_searches(cache_dir):
+    instance = searcher.Searcher(cache_backend=MemoryCache(), rate_limiter=object(), session=object(),
+                                 source_concurrency={'semantic_scholar': 2, 'arxiv': 1, 'google_scholar': 1})
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def fetcher(source):
+        def fetch(query, limit=5):
+            with lock:
+                running[source] = running.get(source, 0) + 1
+                peak[source] = max(peak.get(source, 0), running[source])
+            time.sleep(0.02)
+            with lock:
+                running[source] -= 1
+            return []
+        return fetch
+
+    instance._source_fetchers = lambda: {source: fetcher(source) for source in instance.source_concurrency}
+    searches = [threading.Thread(target=instance.search_multiple_queries, args=([f"query {i}", f"other {i}"],))
+                for i in range(3)]
+    for t in searches:
+        t.start()
+    for t in searches:
+        t.join()
+    instance.close()
+    assert peak == {'semantic_scholar': 2, 'arxiv': 1, 'google_scholar': 1}
@@ -0,0 +1,34 @@
+from stage_graph import Stage, StageGraph
+
+def run(graph, items):
+    graph.start()
+    for item in items:
+        graph.submit(item)
+    graph.close_input()
+    results = [payload for kind, payload in graph.stream() if kind == 'result']
+    graph.shutdown()
+    return results
+
+def parse(item):
+    return 'double', int(item)
+
+def double(value):
+    if value == 3:
+        raise RuntimeError("boom")
+    return None, value * 2
+
+def test_items_flow_through_stages():
+    graph = StageGraph([Stage('parse', parse), Stage('double', double, workers=2)])
+    assert sorted(run(graph, ["1", "2"])) == [2, 4]
+
+def test_failed_items_are_reported_not_dropped():
+    graph = StageGraph([Stage('parse', parse), Stage('double', double)])
+    results = run(graph, ["1", "3", "x"])
+    assert 2 in results
+    errors = sorted((r for r in results if isinstance(r, dict)), key=lambda r: str(r['item']))
+    assert errors == [{'item': 3, 'error': "boom"},
+                      {'item': "x", 'error': "invalid literal for int() with base 10: 'x'"}]
+
+def test_stage_error_handler_builds_the_result():
+    graph = StageGraph([Stage('parse', parse, on_error=lambda item, e: ('failed', item)), Stage('double', double)])
+    assert sorted(run(graph, ["1", "x"]), key=str) == [('failed', "x"), 2]